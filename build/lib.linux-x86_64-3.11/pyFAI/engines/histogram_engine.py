@@ -0,0 +1,489 @@
+#
+#    Copyright (C) 2019-2022 European Synchrotron Radiation Facility, Grenoble, France
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#  .
+#  The above copyright notice and this permission notice shall be included in
+#  all copies or substantial portions of the Software.
+#  .
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+#  THE SOFTWARE.
+
+"""simple histogram rebinning engine implemented in pure python (with the help of numpy !) 
+
+Several images can be integrated concurrently from a
+`concurrent.futures.ThreadPoolExecutor`: the engines keep no state and the
+bin indices memoized by the AzimuthalIntegrator are only read.
+`histogram1d_batch` integrates a stack of frames sharing one geometry, optionally with threads.
+Only the numpy ufuncs release the GIL here, so the speed-up is limited;
+the cython engine (`pyFAI.ext.histogram.histogram1d_engine`) runs
+preprocessing and accumulation without the GIL and scales with the
+number of threads.
+"""
+
+__author__ = "Jerome Kieffer"
+__contact__ = "Jerome.Kieffer@ESRF.eu"
+__license__ = "MIT"
+__copyright__ = "European Synchrotron Radiation Facility, Grenoble, France"
+__date__ = "14/10/2026"
+__status__ = "development"
+
+import logging
+logger = logging.getLogger(__name__)
+from concurrent.futures import ThreadPoolExecutor
+import numpy
+from ..utils import EPS32
+from .preproc import preproc as preproc_np
+try:
+    from ..ext.preproc import preproc as preproc_cy
+except ImportError as err:
+    logger.warning("ImportError pyFAI.ext.preproc %s", err)
+    preproc = preproc_np
+else:
+    preproc = preproc_cy
+
+from ..containers import Integrate1dtpl, Integrate2dtpl, ErrorModel
+try:
+    import fast_histogram
+except ImportError:
+    logger.debug("Backtrace", exc_info=True)
+    fast_histogram = None
+
+
+def uniform_bin_indices(position, pos_min, pos_max, bins):
+    """Calculate the bin index of every position for uniform bins.
+
+    Like in numpy.histogram, the last bin includes its upper edge.
+
+    :param position: 1D array with the position of each pixel
+    :param pos_min: lower bound of the first bin
+    :param pos_max: upper bound of the last bin
+    :param bins: number of bins
+    :return: 2-tuple with the index of the bin (intp array) and the mask of
+             valid pixels. Indices of invalid pixels are set to 0.
+    """
+    valid = numpy.logical_and(position >= pos_min, position <= pos_max)
+    # The bin arithmetic is performed in double precision, like in the cython engine
+    fbin = numpy.subtract(position, pos_min, dtype=numpy.float64)
+    fbin *= bins / (pos_max - pos_min)
+    fbin = numpy.minimum(fbin, bins - 1, out=fbin)
+    idx = numpy.where(valid, fbin, 0).astype(numpy.intp)
+    return idx, valid
+
+
+def _bin_range(position, pos_range=None, margin=1.0):
+    """Calculate the bounds of uniform bins, like numpy.histogram does.
+
+    :param position: 1D array with the position of each pixel
+    :param pos_range: provide lower and upper bound, by default the extrema
+    :param margin: the maximum is multiplied by this value when no range is provided
+    :return: 2-tuple of float with lower and upper bounds
+    """
+    if pos_range is None:
+        pos_range = (position.min(), position.max() * margin)
+    pos_min = float(min(pos_range))
+    pos_max = float(max(pos_range))
+    if pos_min == pos_max:  # same as numpy.histogram
+        pos_min -= 0.5
+        pos_max += 0.5
+    return pos_min, pos_max
+
+
+def bin_centers(pos_min, pos_max, bins):
+    """Calculate the position of the center of uniform bins.
+
+    :param pos_min: lower bound of the first bin
+    :param pos_max: upper bound of the last bin
+    :param bins: number of bins
+    :return: 1D array of float64 with the center of each bin
+    """
+    return pos_min + (numpy.arange(bins, dtype=numpy.float64) + 0.5) * ((pos_max - pos_min) / bins)
+
+
+def _preproc_channels(raw, variance=None, error_model=ErrorModel.NO, **kwargs):
+    """Preprocess the raw data and split it into its channels.
+
+    Without error propagation, only signal and normalization are needed:
+    this halves the size of the preprocessed data. Counts are then deduced
+    from the normalization which preproc sets to 0 for every invalid pixel.
+
+    :param raw: 2D array with the raw signal
+    :param variance: provide an estimation of the variance
+    :param error_model: the ErrorModel to use
+    :param kwargs: other parameters of preproc (dark, flat, mask, ...)
+    :return: 4-tuple of 1D arrays with signal, variance (None without error
+             propagation), normalization and count of each pixel
+    """
+    nchan = 4 if (error_model or variance is not None) else 2
+    prep = preproc(raw,
+                   variance=variance,
+                   error_model=error_model,
+                   split_result=nchan,
+                   empty=0,
+                   soa=True,
+                   **kwargs).reshape(nchan, -1)
+    if nchan == 4:
+        return tuple(prep)
+    signal, normalization = prep
+    return signal, None, normalization, numpy.not_equal(normalization, 0).view(numpy.uint8)
+
+
+def _histogram_block(histogram, weights, shape):
+    """Histogram all weights into a single block.
+
+    All quantities share the same bins: the histogram function is called
+    in a loop over the stacked weights.
+
+    :param histogram: function calculating the histogram of one weight array
+    :param weights: list of 1D arrays with the weights of each pixel
+    :param shape: shape of one histogram
+    :return: float64 array of shape (len(weights),) + shape
+    """
+    histos = numpy.empty((len(weights),) + tuple(shape), dtype=numpy.float64)
+    for histo, weight in zip(histos, weights):
+        histo[...] = histogram(weight)
+    return histos
+
+
+def _empty_value(empty=None, dummy=None):
+    """Value given to empty bins: dummy if provided, else empty, else NaN"""
+    if dummy is not None:
+        return dummy
+    return numpy.nan if empty is None else empty
+
+
+def _divide_valid(numerator, denominator, valid, empty, out=None):
+    """Divide only the valid (non-empty) bins.
+
+    Outputs are initialized with the empty value and only non-empty bins are calculated.
+
+    :param numerator: array with the numerator
+    :param denominator: array with the denominator
+    :param valid: boolean array with the bins to calculate
+    :param empty: value given to the other bins
+    :param out: array to store the result into, already initialized with empty
+    :return: the quotient
+    """
+    if out is None:
+        out = numpy.full_like(numerator, empty)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        return numpy.divide(numerator, denominator, out=out, where=valid)
+
+
+def histogram1d_indices(radial, npt, radial_range=None):
+    """Calculate the bin index of each pixel for histogram1d_engine.
+
+    Those indices only depend on the geometry, the number of bins and
+    the radial range: they can be calculated once and re-used for the
+    integration of many images (see the `precomputed_idx` parameter of
+    `histogram1d_engine`).
+
+    :param radial: radial position 2D array (same shape as raw)
+    :param npt: number of points to integrate over
+    :param radial_range: provide lower and upper bound for radial position, by default the extrema
+    :return: 2-tuple with the bin index of each pixel (intp array, npt for
+             out-of-range pixels) and the position of the center of the bins.
+    """
+    # Positions are read in their native precision, without copy
+    radial = radial.ravel()
+    rmin, rmax = _bin_range(radial, radial_range, EPS32)
+
+    # Bins are uniform: the bin index of each pixel is calculated once and
+    # re-used for all histograms. Out of range pixels go into an extra bin.
+    idx, valid = uniform_bin_indices(radial, rmin, rmax, npt)
+    idx[numpy.logical_not(valid)] = npt
+    return idx, bin_centers(rmin, rmax, npt)
+
+
+def histogram1d_engine(radial, npt,
+                       raw,
+                       dark=None,
+                       flat=None,
+                       solidangle=None,
+                       polarization=None,
+                       absorption=None,
+                       mask=None,
+                       dummy=None,
+                       delta_dummy=None,
+                       normalization_factor=1.0,
+                       empty=None,
+                       split_result=False,
+                       variance=None,
+                       dark_variance=None,
+                       error_model=ErrorModel.NO, 
+                       radial_range=None,
+                       precomputed_idx=None
+                       ):
+    """Implementation of rebinning engine using pure numpy histograms
+    
+    :param radial: radial position 2D array (same shape as raw)   
+    :param npt: number of points to integrate over
+    :param raw: 2D array with the raw signal
+    :param dark: array containing the value of the dark noise, to be subtracted
+    :param flat: Array containing the flatfield image. It is also checked for dummies if relevant.
+    :param solidangle: the value of the solid_angle. This processing may be performed during the rebinning instead. left for compatibility
+    :param polarization: Correction for polarization of the incident beam
+    :param absorption: Correction for absorption in the sensor volume
+    :param mask: 2d array of int/bool: non-null where data should be ignored
+    :param dummy: value of invalid data
+    :param delta_dummy: precision for invalid data
+    :param normalization_factor: final value is divided by this
+    :param empty: value to be given for empty bins
+    :param variance: provide an estimation of the variance
+    :param dark_variance: provide an estimation of the variance of the dark_current,
+    :param error_model: Use the provided ErrorModel, only "poisson" and "variance" is valid 
+    :param radial_range: provide lower and upper bound for radial position, by default the extrema
+    :param precomputed_idx: result of `histogram1d_indices` for the same radial, npt and
+                            radial_range, to skip the calculation of the bin indices.
+
+
+    NaN are always considered as invalid values
+
+    if neither empty nor dummy is provided, empty pixels are left at 0.
+    
+    Nota: "azimuthal_range" has to be integrated into the 
+           mask prior to the call of this function 
+
+    Nota: the compiled counterpart with the same signature is
+          `pyFAI.ext.histogram.histogram1d_engine`, selected with the
+          ("no", "histogram", "cython") method. This one is the fall-back.
+    
+    :return: Integrate1dtpl named tuple containing: 
+            position, average intensity, std on intensity, 
+            plus the various histograms on signal, variance, normalization and count.  
+                                               
+    """
+    pp_signal, pp_variance, pp_normalization, pp_count = _preproc_channels(raw,
+                                                                           dark=dark,
+                                                                           flat=flat,
+                                                                           solidangle=solidangle,
+                                                                           polarization=polarization,
+                                                                           absorption=absorption,
+                                                                           mask=mask,
+                                                                           dummy=dummy,
+                                                                           delta_dummy=delta_dummy,
+                                                                           normalization_factor=normalization_factor,
+                                                                           variance=variance,
+                                                                           dark_variance=dark_variance,
+                                                                           error_model=error_model)
+    if precomputed_idx is None and fast_histogram is not None:
+        # fast_histogram bins directly, without intermediate index array
+        radial = radial.ravel()
+        assert pp_signal.size == radial.size
+        rmin, rmax = _bin_range(radial, radial_range, EPS32)
+        positions = bin_centers(rmin, rmax, npt)
+        # fast_histogram excludes the upper edge where numpy.histogram includes it
+        rng = (rmin, numpy.nextafter(rmax, numpy.inf))
+
+        def histogram(weights):
+            return fast_histogram.histogram1d(radial, npt, rng, weights=weights)
+    else:
+        if precomputed_idx is None:
+            precomputed_idx = histogram1d_indices(radial, npt, radial_range)
+        idx, positions = precomputed_idx
+        assert pp_signal.size == idx.size
+        # numpy.bincount works on intp: indices provided with another type are converted once
+        idx = idx.astype(numpy.intp, copy=False)
+
+        def histogram(weights):
+            return numpy.bincount(idx, weights=weights, minlength=npt + 1)[:npt]
+
+    if error_model == ErrorModel.AZIMUTHAL:
+        raise NotImplementedError("Numpy histogram are not able to assess variance in azimuthal bins")
+    weights = [pp_signal, pp_normalization, pp_count]
+    if error_model:  # Variance, Poisson and Hybrid
+        weights += [pp_variance, pp_normalization * pp_normalization]
+    histos = _histogram_block(histogram, weights, (npt,))
+    histo_signal, histo_normalization, histo_count = histos[:3]
+    if error_model:
+        histo_variance, histo_normalization2 = histos[3:]
+    else:  # No error propagated
+        histo_variance = histo_normalization2 = None
+
+    mask_ok = histo_count != 0
+    empty = _empty_value(empty, dummy)
+    intensity = _divide_valid(histo_signal, histo_normalization, mask_ok, empty)
+    if histo_variance is None:
+        std = sem = None
+    else:
+        # sqrt(variance) is shared by std and sem
+        sqrt_var = numpy.sqrt(histo_variance, out=numpy.full_like(histo_signal, empty), where=mask_ok)
+        std = _divide_valid(sqrt_var, numpy.sqrt(histo_normalization2), mask_ok, empty)
+        sem = _divide_valid(sqrt_var, histo_normalization, mask_ok, empty, out=sqrt_var)
+    return Integrate1dtpl(positions, intensity, sem, histo_signal, histo_variance, histo_normalization, histo_count,
+                          std, sem, histo_normalization2)
+
+
+def histogram1d_batch(radial, npt, raw,
+                      axis=0,
+                      radial_range=None,
+                      precomputed_idx=None,
+                      max_workers=1,
+                      **kwargs):
+    """Integrate a stack of frames sharing the same geometry with histogram1d_engine
+
+    The bin indices are calculated once for the whole stack. Frames are
+    processed sequentially by default, or concurrently in a
+    `concurrent.futures.ThreadPoolExecutor` with `max_workers` > 1.
+    Only the preprocessing (cython implementation) releases the GIL.
+
+    Nota: each thread holds the temporary arrays of a full frame (preprocessed
+    data and the float64 weights used by bincount), about 40 bytes per pixel:
+    600 MB per thread for a 4k x 4k frame.
+
+    :param radial: radial position 2D array (same shape as one frame)
+    :param npt: number of points to integrate over
+    :param raw: 3D array with the stack of frames
+    :param axis: the axis of raw along which frames are stacked
+    :param radial_range: provide lower and upper bound for radial position, by default the extrema
+    :param precomputed_idx: result of `histogram1d_indices`, calculated here if not provided
+    :param max_workers: number of threads, by default 1: frames are processed sequentially
+    :param kwargs: other parameters of `histogram1d_engine` (dark, flat, mask, error_model, ...), shared by all frames
+    :return: Integrate1dtpl named tuple with the position of the bins and
+             all other arrays stacked with the shape (nframes, npt).
+    :raise ValueError: if the stack contains no frame
+    """
+    raw = numpy.moveaxis(numpy.asarray(raw), axis, 0)
+    if len(raw) == 0:
+        raise ValueError("The stack of frames is empty")
+    if precomputed_idx is None:
+        precomputed_idx = histogram1d_indices(radial, npt, radial_range)
+
+    def integrate(frame):
+        return histogram1d_engine(radial, npt, frame,
+                                  radial_range=radial_range,
+                                  precomputed_idx=precomputed_idx,
+                                  **kwargs)
+
+    # The number of threads is bounded explicitly, never by the default of ThreadPoolExecutor
+    max_workers = min(max(1, int(max_workers or 1)), len(raw))
+    if max_workers <= 1:
+        results = [integrate(frame) for frame in raw]
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(integrate, raw))
+    stacked = [None if results[0][i] is None else numpy.stack([res[i] for res in results])
+               for i in range(1, len(Integrate1dtpl._fields))]
+    return Integrate1dtpl(precomputed_idx[1], *stacked)
+
+
+def histogram2d_engine(radial, azimuthal, npt,
+                       raw,
+                       dark=None,
+                       flat=None,
+                       solidangle=None,
+                       polarization=None,
+                       absorption=None,
+                       mask=None,
+                       dummy=None,
+                       delta_dummy=None,
+                       normalization_factor=1.0,
+                       empty=None,
+                       split_result=False,
+                       variance=None,
+                       dark_variance=None,
+                       error_model=ErrorModel.NO,
+                       radial_range=None,
+                       azimuth_range=None
+                       ):
+    """Implementation of 2D rebinning engine using pure numpy histograms
+    
+    :param radial: radial position 2D array (same shape as raw)
+    :param azimuthal: azimuthal position 2D array (same shape as raw)
+    :param npt: number of points to integrate over in (radial, azimuthal) dimensions
+    :param raw: 2D array with the raw signal
+    :param dark: array containing the value of the dark noise, to be subtracted
+    :param flat: Array containing the flatfield image. It is also checked for dummies if relevant.
+    :param solidangle: the value of the solid_angle. This processing may be performed during the rebinning instead. left for compatibility
+    :param polarization: Correction for polarization of the incident beam
+    :param absorption: Correction for absorption in the sensor volume
+    :param mask: 2d array of int/bool: non-null where data should be ignored
+    :param dummy: value of invalid data
+    :param delta_dummy: precision for invalid data
+    :param normalization_factor: final value is divided by this
+    :param empty: value to be given for empty bins
+    :param variance: provide an estimation of the variance
+    :param dark_variance: provide an estimation of the variance of the dark_current,
+    :param error_model: set to "poisson" for assuming the detector is poissonian and variance = raw + dark
+
+
+    NaN are always considered as invalid values
+
+    if neither empty nor dummy is provided, empty pixels are left at 0.
+    
+    Nota: "azimuthal_range" has to be integrated into the 
+           mask prior to the call of this function 
+    
+    :return: Integrate1dtpl named tuple containing: 
+            position, average intensity, std on intensity, 
+            plus the various histograms on signal, variance, normalization and count.  
+                                               
+    """
+    pp_signal, pp_variance, pp_normalization, pp_count = _preproc_channels(raw,
+                                                                           dark=dark,
+                                                                           flat=flat,
+                                                                           solidangle=solidangle,
+                                                                           polarization=polarization,
+                                                                           absorption=absorption,
+                                                                           mask=mask,
+                                                                           dummy=dummy,
+                                                                           delta_dummy=delta_dummy,
+                                                                           normalization_factor=normalization_factor,
+                                                                           variance=variance,
+                                                                           dark_variance=dark_variance,
+                                                                           error_model=error_model)
+    # Positions are read in their native precision, without copy
+    radial = radial.ravel()
+    azimuthal = azimuthal.ravel()
+    assert pp_signal.size == radial.size
+    assert pp_signal.size == azimuthal.size
+    npt = tuple(max(1, i) for i in npt)
+    nbins = npt[0] * npt[1]
+    rmin, rmax = _bin_range(radial, radial_range)
+    amin, amax = _bin_range(azimuthal, azimuth_range)
+
+    if fast_histogram is not None:
+        # fast_histogram excludes the upper edge where numpy.histogram2d includes it
+        rng = ((rmin, numpy.nextafter(rmax, numpy.inf)),
+               (amin, numpy.nextafter(amax, numpy.inf)))
+
+        def histogram(weights):
+            return fast_histogram.histogram2d(radial, azimuthal, npt, rng, weights=weights).T
+    else:
+        # Bins are uniform: the linear 2D-bin index of each pixel is calculated
+        # once and re-used for all histograms, out of range pixels go into an extra bin.
+        idx_rad, valid_rad = uniform_bin_indices(radial, rmin, rmax, npt[0])
+        idx_azim, valid_azim = uniform_bin_indices(azimuthal, amin, amax, npt[1])
+        idx = numpy.ravel_multi_index((idx_rad, idx_azim), npt)
+        idx[numpy.logical_not(numpy.logical_and(valid_rad, valid_azim))] = nbins
+
+        def histogram(weights):
+            return numpy.bincount(idx, weights=weights, minlength=nbins + 1)[:nbins].reshape(npt).T
+
+    weights = [pp_signal, pp_normalization, pp_count]
+    if error_model:
+        weights.append(pp_variance)
+    histos = _histogram_block(histogram, weights, (npt[1], npt[0]))
+    histo_signal, histo_normalization, histo_count = histos[:3]
+    histo_variance = histos[3] if error_model else None
+    bins_rad = bin_centers(rmin, rmax, npt[0])
+    bins_azim = bin_centers(amin, amax, npt[1])
+
+    mask_ok = histo_count != 0
+    empty = _empty_value(empty, dummy)
+    intensity = _divide_valid(histo_signal, histo_normalization, mask_ok, empty)
+    if histo_variance is None:
+        error = None
+    else:
+        error = _divide_valid(numpy.sqrt(histo_variance), histo_normalization, mask_ok, empty)
+    return Integrate2dtpl(bins_rad, bins_azim, intensity, error, histo_signal, histo_variance, histo_normalization, histo_count)
@@ -0,0 +1 @@
+from ._plot import *
\ No newline at end of file
@@ -0,0 +1 @@
+#undef cl_khr_int64_base_atomics
@@ -0,0 +1,140 @@
+/*
+ *   Project: Azimuthal regroupping OpenCL kernel for PyFAI.
+ *            Preprocessing program
+ *
+ *
+ *   Copyright (C) 2012-2018 European Synchrotron Radiation Facility
+ *                           Grenoble, France
+ *
+ *   Principal authors: J. Kieffer (kieffer@esrf.fr)
+ *   Last revision: 19/01/2017
+ *
+ * Permission is hereby granted, free of charge, to any person obtaining a copy
+ * of this software and associated documentation files (the "Software"), to deal
+ * in the Software without restriction, including without limitation the rights
+ * to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+ * copies of the Software, and to permit persons to whom the Software is
+ * furnished to do so, subject to the following conditions:
+ *
+ * The above copyright notice and this permission notice shall be included in
+ * all copies or substantial portions of the Software.
+ *
+ * THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ * IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+ * FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+ * AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+ * LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+ * OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+ * THE SOFTWARE.
+
+ */
+
+/**
+ * \file
+ *
+ * \brief OpenCL kernels for image array casting, array mem-setting and normalizing
+ *
+ * Constant to be provided at build time:
+ *   NBINS:  number of output bins for histograms
+ *
+ */
+
+#include "for_eclipse.h"
+
+/**
+ * \brief Sets the values of 3 float output arrays to zero.
+ *
+ * Gridsize = size of arrays + padding.
+ *
+ * - array0: float Pointer to global memory with the outMerge array
+ * - array1: float Pointer to global memory with the outCount array
+ * - array2: float Pointer to global memory with the outData array
+ */
+kernel void
+memset_out(global float *array0,
+           global float *array1,
+           global float *array2
+)
+{
+  int i = get_global_id(0);
+  //Global memory guard for padding
+  if (i < NBINS)
+  {
+    array0[i] = 0.0f;
+    array1[i] = 0.0f;
+    array2[i] = 0.0f;
+  }
+}
+
+kernel void
+memset_ng(global float *array0,
+          global float *array1,
+          global float8 *array2
+)
+{
+  int i = get_global_id(0);
+  //Global memory guard for padding
+  if (i < NBINS)
+  {
+    array0[i] = 0.0f;
+    array1[i] = 0.0f;
+    array2[i] = (float8)(0.0f, 0.0f, 0.0f, 0.0f, 0.0f, 0.0f, 0.0f, 0.0f);
+  }
+}
+
+kernel void
+memset1(global float *array)
+{
+  int i = get_global_id(0);
+  //Global memory guard for padding
+  if (i < NBINS)
+  {
+    array[i] = 0.0f;
+  }
+}
+
+kernel void
+memset2(global float2 *array)
+{
+  int i = get_global_id(0);
+  //Global memory guard for padding
+  if (i < NBINS)
+  {
+    array[i] = (float2)(0.0f, 0.0f);
+  }
+}
+
+kernel void
+memset4(global float4 *array)
+{
+  int i = get_global_id(0);
+  //Global memory guard for padding
+  if (i < NBINS)
+  {
+    array[i] = (float4)(0.0f, 0.0f, 0.0f, 0.0f);
+  }
+}
+
+
+kernel void
+memset8(global float8 *array)
+{
+  int i = get_global_id(0);
+  //Global memory guard for padding
+  if (i < NBINS)
+  {
+    array[i] = (float8)(0.0f, 0.0f, 0.0f, 0.0f, 0.0f, 0.0f, 0.0f, 0.0f);
+  }
+}
+
+kernel void
+memset_int(global int *array, int pattern, int size)
+{
+  int i = get_global_id(0);
+  //Global memory guard for padding
+  if (i < size)
+  {
+    array[i] = pattern;
+  }
+}
+
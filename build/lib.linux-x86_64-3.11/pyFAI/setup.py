@@ -0,0 +1,58 @@
+# coding: utf-8
+# /*##########################################################################
+#
+# Copyright (C) 2015-2018 European Synchrotron Radiation Facility
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+# ###########################################################################*/
+
+__authors__ = ["V. Valls"]
+__license__ = "MIT"
+__date__ = "03/01/2019"
+
+import os
+from numpy.distutils.misc_util import Configuration
+
+
+def configuration(parent_package='', top_path=None):
+    config = Configuration('pyFAI', parent_package, top_path)
+    config.add_subpackage('app')
+    config.add_subpackage('benchmark')
+    config.add_subpackage('detectors')
+    config.add_subpackage('engines')
+    config.add_subpackage('ext')
+    config.add_subpackage('gui')
+    config.add_subpackage('opencl')
+    config.add_subpackage('resources')
+    config.add_subpackage('test')
+    config.add_subpackage('utils')
+    config.add_subpackage('io')
+
+    # includes third_party only if it is available
+    local_path = os.path.join(top_path, parent_package, "pyFAI", "third_party")
+    if os.path.exists(local_path):
+        config.add_subpackage('third_party')
+
+    return config
+
+
+if __name__ == "__main__":
+    from numpy.distutils.core import setup
+    setup(configuration=configuration)
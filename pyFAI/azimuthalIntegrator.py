@@ -30,7 +30,7 @@ __author__ = "Jérôme Kieffer"
 __contact__ = "Jerome.Kieffer@ESRF.eu"
 __license__ = "MIT"
 __copyright__ = "European Synchrotron Radiation Facility, Grenoble, France"
-__date__ = "05/07/2022"
+__date__ = "14/10/2026"
 __status__ = "stable"
 __docformat__ = 'restructuredtext'
 
@@ -1056,19 +1056,24 @@ class AzimuthalIntegrator(Geometry):
                     sigma[b == 0] = dummy if dummy is not None else self._empty
             elif method.impl_lower == "python":
                 logger.debug("integrate1d uses Numpy implementation")
-                count, b = numpy.histogram(pos0, npt, range=radial_range)
-                qAxis = (b[1:] + b[:-1]) / 2.0
-                sum_, b = numpy.histogram(pos0, npt, weights=data, range=radial_range)
+                # Bins are uniform: the bin index is calculated once instead of
+                # searching the edges in numpy.histogram for each histogram.
+                rmin, rmax = float(min(radial_range)), float(max(radial_range))
+                idx, valid = histogram_engine.uniform_bin_indices(pos0, rmin, rmax, npt)
+                idx[numpy.logical_not(valid)] = npt
+                count = numpy.bincount(idx, minlength=npt + 1)[:npt].astype(numpy.float64)
+                sum_ = numpy.bincount(idx, weights=data, minlength=npt + 1)[:npt]
+                qAxis = histogram_engine.bin_centers(rmin, rmax, npt)
                 with numpy.errstate(divide='ignore', invalid='ignore'):
-                    if error_model == "azimuthal":
-                        variance = (data - self.calcfrom1d(qAxis * pos0_scale, I, dim1_unit=unit, shape=shape)[mask]) ** 2
-                    if variance is not None:
-                        var1d, b = numpy.histogram(pos0, npt, weights=variance, range=radial_range)
-                        sigma = numpy.sqrt(var1d) / (count * normalization_factor)
-                        sigma[count == 0] = dummy if dummy is not None else self._empty
+                    I = sum_ / count / normalization_factor
+                I[count == 0] = dummy if dummy is not None else self._empty
+                if error_model == "azimuthal":
+                    variance = (data - self.calcfrom1d(qAxis * pos0_scale, I, dim1_unit=unit, shape=shape)[mask]) ** 2
+                if variance is not None:
+                    var1d = numpy.bincount(idx, weights=variance, minlength=npt + 1)[:npt]
                     with numpy.errstate(divide='ignore', invalid='ignore'):
-                        I = sum_ / count / normalization_factor
-                    I[count == 0] = dummy if dummy is not None else self._empty
+                        sigma = numpy.sqrt(var1d) / (count * normalization_factor)
+                    sigma[count == 0] = dummy if dummy is not None else self._empty
 
         if pos0_scale:
             # not in place to make a copy
@@ -1394,6 +1399,28 @@ class AzimuthalIntegrator(Geometry):
                 else:
                     mask = numpy.logical_or(mask, azim_mask)
             radial = self.array_from_unit(shape, "center", unit, scale=False)
+            kwargs = {"radial_range": radial_range}
+            if method.method[3] == "python":
+                # Bin indices only depend on the geometry: memoize them for the next images,
+                # unless fast_histogram is available, which bins faster than bincount on those indices.
+                if histogram_engine.fast_histogram is not None:
+                    if radial_range is None:
+                        # same bins as without range, without scanning the positions at every image
+                        rmin, rmax = self.center_extrema(shape, unit)
+                        kwargs["radial_range"] = (rmin, rmax * EPS32)
+                else:
+                    if method not in self.engines:
+                        engine = self.engines[method] = Engine()
+                    else:
+                        engine = self.engines[method]
+                    key = (shape, unit, npt, radial_range)
+                    with engine.lock:
+                        if engine.engine is None or engine.engine[0] != key:
+                            engine.set_engine((key, histogram_engine.histogram1d_indices(radial, npt, radial_range)))
+                        kwargs["precomputed_idx"] = engine.engine[1]
+            elif radial_range is None:
+                # the engine widens the upper bound by EPS32 like with no range
+                kwargs["radial_range"] = self.center_extrema(shape, unit)
 
             intpl = integr(radial, npt, data,
                            dark=dark,
@@ -1403,8 +1430,8 @@ class AzimuthalIntegrator(Geometry):
                            polarization=polarization,
                            normalization_factor=normalization_factor,
                            mask=mask,
-                           radial_range=radial_range,
-                           error_model=error_model)
+                           error_model=error_model,
+                           **kwargs)
 
             if error_model.do_variance:
                 result = Integrate1dResult(intpl.position * unit.scale,
@@ -2070,12 +2097,20 @@ class AzimuthalIntegrator(Geometry):
                                                                             normalization_factor=normalization_factor)
             elif method.impl_lower == "python":
                 logger.debug("integrate2d uses Numpy implementation")
-                count, b, c = numpy.histogram2d(pos1, pos0, (npt_azim, npt_rad), range=[azimuth_range, radial_range])
-                bins_azim = (b[1:] + b[:-1]) / 2.0
-                bins_rad = (c[1:] + c[:-1]) / 2.0
+                # Bins are uniform: the 2D-bin index is calculated once instead of
+                # searching the edges in numpy.histogram2d for each histogram.
+                amin, amax = float(min(azimuth_range)), float(max(azimuth_range))
+                rmin, rmax = float(min(radial_range)), float(max(radial_range))
+                idx_azim, valid_azim = histogram_engine.uniform_bin_indices(pos1, amin, amax, npt_azim)
+                idx_rad, valid_rad = histogram_engine.uniform_bin_indices(pos0, rmin, rmax, npt_rad)
+                nbins = npt_azim * npt_rad
+                idx = numpy.ravel_multi_index((idx_azim, idx_rad), (npt_azim, npt_rad))
+                idx[numpy.logical_not(numpy.logical_and(valid_azim, valid_rad))] = nbins
+                count = numpy.bincount(idx, minlength=nbins + 1)[:nbins].reshape(npt_azim, npt_rad).astype(numpy.float64)
+                sum_ = numpy.bincount(idx, weights=data, minlength=nbins + 1)[:nbins].reshape(npt_azim, npt_rad)
+                bins_azim = histogram_engine.bin_centers(amin, amax, npt_azim)
+                bins_rad = histogram_engine.bin_centers(rmin, rmax, npt_rad)
                 count1 = numpy.maximum(1, count)
-                sum_, b, c = numpy.histogram2d(pos1, pos0, (npt_azim, npt_rad),
-                                               weights=data, range=[azimuth_range, radial_range])
                 I = sum_ / count1 / normalization_factor
                 I[count == 0] = dummy if dummy is not None else self._empty
         # I know I make copies ....
@@ -2581,9 +2616,9 @@ class AzimuthalIntegrator(Geometry):
                     pos1 = self.chiArray(shape).ravel()
 
                     if radial_range is None:
-                        radial_range = [pos0.min(), pos0.max()]
+                        radial_range = self.center_extrema(shape, unit)
                     if azimuth_range is None:
-                        azimuth_range = [pos1.min(), pos1.max()]
+                        azimuth_range = self.center_extrema(shape, None)
 
                     if method.method[1:4] == ("no", "histogram", "python"):
                         logger.debug("integrate2d uses Numpy implementation")
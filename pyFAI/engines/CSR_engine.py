@@ -26,7 +26,7 @@ __author__ = "Jerome Kieffer"
 __contact__ = "Jerome.Kieffer@ESRF.eu"
 __license__ = "MIT"
 __copyright__ = "European Synchrotron Radiation Facility, Grenoble, France"
-__date__ = "13/07/2022"
+__date__ = "14/10/2026"
 __status__ = "development"
 
 import logging
@@ -61,7 +61,7 @@ class CSRIntegrator(object):
         :param empty: value for empty pixels
         """
         self.size = image_size
-        self.preprocessed = numpy.empty((image_size, 4), dtype=numpy.float32)
+        self.preprocessed = numpy.empty((4, image_size), dtype=numpy.float32)  # structure of arrays
         self.empty = empty
         self.bins = None
         self._csr = None
@@ -136,9 +136,10 @@ class CSRIntegrator(object):
                        variance=variance,
                        dtype=numpy.float32,
                        error_model=error_model,
-                       out=self.preprocessed)
-        prep.shape = numpy.prod(shape), 4
-        flat_sig, flat_var, flat_nrm, flat_cnt = prep.T  # should create views!
+                       out=self.preprocessed,
+                       soa=True)
+        prep.shape = 4, numpy.prod(shape)
+        flat_sig, flat_var, flat_nrm, flat_cnt = prep  # contiguous views
         res = numpy.empty((numpy.prod(self.bins), 5), dtype=numpy.float32)
         res[:, 0] = self._csr.dot(flat_sig)  # Σ c·x
         res[:, 2] = self._csr.dot(flat_nrm)  # Σ c·ω
@@ -317,12 +318,13 @@ class CsrIntegrator1d(CSRIntegrator):
                        dark_variance=dark_variance,
                        dtype=numpy.float32,
                        error_model=error_model,
-                       out=self.preprocessed)
+                       out=self.preprocessed,
+                       soa=True)
 
-        prep_flat = prep.reshape((numpy.prod(shape), 4))
+        prep_flat = prep.reshape((4, numpy.prod(shape)))
 
         # First azimuthal integration:
-        flat_sig, flat_var, flat_nrm, flat_cnt = prep_flat.T  # should create views!
+        flat_sig, flat_var, flat_nrm, flat_cnt = prep_flat  # contiguous views
         sum_sig = self._csr.dot(flat_sig)
         sum_nrm = self._csr.dot(flat_nrm)
         sum_nrm2 = self._csr2.dot(flat_nrm ** 2)
@@ -351,7 +353,7 @@ class CsrIntegrator1d(CSRIntegrator):
                 chauvenet = numpy.maximum(cutoff, numpy.sqrt(2.0 * numpy.log(cnt2d / numpy.sqrt(2.0 * numpy.pi))))
                 msk2d = numpy.where(numpy.logical_not(abs(delta) <= chauvenet * std2d))
                 # discard outlier pixel here:
-                prep_flat[msk2d] = 0
+                prep_flat[:, msk2d[0]] = 0
                 # subsequent integrations:
                 sum_sig = self._csr.dot(flat_sig)
                 sum_nrm = self._csr.dot(flat_nrm)
@@ -20,17 +20,27 @@
 #  THE SOFTWARE.
 
 """simple histogram rebinning engine implemented in pure python (with the help of numpy !) 
+
+Several images can be integrated concurrently from a
+`concurrent.futures.ThreadPoolExecutor`: the engines keep no state and the
+bin indices memoized by the AzimuthalIntegrator are only read.
+`histogram1d_batch` integrates a stack of frames sharing one geometry, optionally with threads.
+Only the numpy ufuncs release the GIL here, so the speed-up is limited;
+the cython engine (`pyFAI.ext.histogram.histogram1d_engine`) runs
+preprocessing and accumulation without the GIL and scales with the
+number of threads.
 """
 
 __author__ = "Jerome Kieffer"
 __contact__ = "Jerome.Kieffer@ESRF.eu"
 __license__ = "MIT"
 __copyright__ = "European Synchrotron Radiation Facility, Grenoble, France"
-__date__ = "29/06/2022"
+__date__ = "14/10/2026"
 __status__ = "development"
 
 import logging
 logger = logging.getLogger(__name__)
+from concurrent.futures import ThreadPoolExecutor
 import numpy
 from ..utils import EPS32
 from .preproc import preproc as preproc_np
@@ -43,6 +53,156 @@ else:
     preproc = preproc_cy
 
 from ..containers import Integrate1dtpl, Integrate2dtpl, ErrorModel
+try:
+    import fast_histogram
+except ImportError:
+    logger.debug("Backtrace", exc_info=True)
+    fast_histogram = None
+
+
+def uniform_bin_indices(position, pos_min, pos_max, bins):
+    """Calculate the bin index of every position for uniform bins.
+
+    Like in numpy.histogram, the last bin includes its upper edge.
+
+    :param position: 1D array with the position of each pixel
+    :param pos_min: lower bound of the first bin
+    :param pos_max: upper bound of the last bin
+    :param bins: number of bins
+    :return: 2-tuple with the index of the bin (intp array) and the mask of
+             valid pixels. Indices of invalid pixels are set to 0.
+    """
+    valid = numpy.logical_and(position >= pos_min, position <= pos_max)
+    # The bin arithmetic is performed in double precision, like in the cython engine
+    fbin = numpy.subtract(position, pos_min, dtype=numpy.float64)
+    fbin *= bins / (pos_max - pos_min)
+    fbin = numpy.minimum(fbin, bins - 1, out=fbin)
+    idx = numpy.where(valid, fbin, 0).astype(numpy.intp)
+    return idx, valid
+
+
+def _bin_range(position, pos_range=None, margin=1.0):
+    """Calculate the bounds of uniform bins, like numpy.histogram does.
+
+    :param position: 1D array with the position of each pixel
+    :param pos_range: provide lower and upper bound, by default the extrema
+    :param margin: the maximum is multiplied by this value when no range is provided
+    :return: 2-tuple of float with lower and upper bounds
+    """
+    if pos_range is None:
+        pos_range = (position.min(), position.max() * margin)
+    pos_min = float(min(pos_range))
+    pos_max = float(max(pos_range))
+    if pos_min == pos_max:  # same as numpy.histogram
+        pos_min -= 0.5
+        pos_max += 0.5
+    return pos_min, pos_max
+
+
+def bin_centers(pos_min, pos_max, bins):
+    """Calculate the position of the center of uniform bins.
+
+    :param pos_min: lower bound of the first bin
+    :param pos_max: upper bound of the last bin
+    :param bins: number of bins
+    :return: 1D array of float64 with the center of each bin
+    """
+    return pos_min + (numpy.arange(bins, dtype=numpy.float64) + 0.5) * ((pos_max - pos_min) / bins)
+
+
+def _preproc_channels(raw, variance=None, error_model=ErrorModel.NO, **kwargs):
+    """Preprocess the raw data and split it into its channels.
+
+    Without error propagation, only signal and normalization are needed:
+    this halves the size of the preprocessed data. Counts are then deduced
+    from the normalization which preproc sets to 0 for every invalid pixel.
+
+    :param raw: 2D array with the raw signal
+    :param variance: provide an estimation of the variance
+    :param error_model: the ErrorModel to use
+    :param kwargs: other parameters of preproc (dark, flat, mask, ...)
+    :return: 4-tuple of 1D arrays with signal, variance (None without error
+             propagation), normalization and count of each pixel
+    """
+    nchan = 4 if (error_model or variance is not None) else 2
+    prep = preproc(raw,
+                   variance=variance,
+                   error_model=error_model,
+                   split_result=nchan,
+                   empty=0,
+                   soa=True,
+                   **kwargs).reshape(nchan, -1)
+    if nchan == 4:
+        return tuple(prep)
+    signal, normalization = prep
+    return signal, None, normalization, numpy.not_equal(normalization, 0).view(numpy.uint8)
+
+
+def _histogram_block(histogram, weights, shape):
+    """Histogram all weights into a single block.
+
+    All quantities share the same bins: the histogram function is called
+    in a loop over the stacked weights.
+
+    :param histogram: function calculating the histogram of one weight array
+    :param weights: list of 1D arrays with the weights of each pixel
+    :param shape: shape of one histogram
+    :return: float64 array of shape (len(weights),) + shape
+    """
+    histos = numpy.empty((len(weights),) + tuple(shape), dtype=numpy.float64)
+    for histo, weight in zip(histos, weights):
+        histo[...] = histogram(weight)
+    return histos
+
+
+def _empty_value(empty=None, dummy=None):
+    """Value given to empty bins: dummy if provided, else empty, else NaN"""
+    if dummy is not None:
+        return dummy
+    return numpy.nan if empty is None else empty
+
+
+def _divide_valid(numerator, denominator, valid, empty, out=None):
+    """Divide only the valid (non-empty) bins.
+
+    Outputs are initialized with the empty value and only non-empty bins are calculated.
+
+    :param numerator: array with the numerator
+    :param denominator: array with the denominator
+    :param valid: boolean array with the bins to calculate
+    :param empty: value given to the other bins
+    :param out: array to store the result into, already initialized with empty
+    :return: the quotient
+    """
+    if out is None:
+        out = numpy.full_like(numerator, empty)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        return numpy.divide(numerator, denominator, out=out, where=valid)
+
+
+def histogram1d_indices(radial, npt, radial_range=None):
+    """Calculate the bin index of each pixel for histogram1d_engine.
+
+    Those indices only depend on the geometry, the number of bins and
+    the radial range: they can be calculated once and re-used for the
+    integration of many images (see the `precomputed_idx` parameter of
+    `histogram1d_engine`).
+
+    :param radial: radial position 2D array (same shape as raw)
+    :param npt: number of points to integrate over
+    :param radial_range: provide lower and upper bound for radial position, by default the extrema
+    :return: 2-tuple with the bin index of each pixel (intp array, npt for
+             out-of-range pixels) and the position of the center of the bins.
+    """
+    # Positions are read in their native precision, without copy
+    radial = radial.ravel()
+    rmin, rmax = _bin_range(radial, radial_range, EPS32)
+
+    # Bins are uniform: the bin index of each pixel is calculated once and
+    # re-used for all histograms. Out of range pixels go into an extra bin.
+    idx, valid = uniform_bin_indices(radial, rmin, rmax, npt)
+    idx[numpy.logical_not(valid)] = npt
+    return idx, bin_centers(rmin, rmax, npt)
 
 
 def histogram1d_engine(radial, npt,
@@ -61,7 +221,8 @@ def histogram1d_engine(radial, npt,
                        variance=None,
                        dark_variance=None,
                        error_model=ErrorModel.NO, 
-                       radial_range=None
+                       radial_range=None,
+                       precomputed_idx=None
                        ):
     """Implementation of rebinning engine using pure numpy histograms
     
@@ -81,6 +242,9 @@ def histogram1d_engine(radial, npt,
     :param variance: provide an estimation of the variance
     :param dark_variance: provide an estimation of the variance of the dark_current,
     :param error_model: Use the provided ErrorModel, only "poisson" and "variance" is valid 
+    :param radial_range: provide lower and upper bound for radial position, by default the extrema
+    :param precomputed_idx: result of `histogram1d_indices` for the same radial, npt and
+                            radial_range, to skip the calculation of the bin indices.
 
 
     NaN are always considered as invalid values
@@ -89,64 +253,130 @@ def histogram1d_engine(radial, npt,
     
     Nota: "azimuthal_range" has to be integrated into the 
            mask prior to the call of this function 
+
+    Nota: the compiled counterpart with the same signature is
+          `pyFAI.ext.histogram.histogram1d_engine`, selected with the
+          ("no", "histogram", "cython") method. This one is the fall-back.
     
     :return: Integrate1dtpl named tuple containing: 
             position, average intensity, std on intensity, 
             plus the various histograms on signal, variance, normalization and count.  
                                                
     """
-    prep = preproc(raw,
-                   dark=dark,
-                   flat=flat,
-                   solidangle=solidangle,
-                   polarization=polarization,
-                   absorption=absorption,
-                   mask=mask,
-                   dummy=dummy,
-                   delta_dummy=delta_dummy,
-                   normalization_factor=normalization_factor,
-                   split_result=4,
-                   variance=variance,
-                   dark_variance=dark_variance,
-                   error_model=error_model,
-                   empty=0
-                   )
-    radial = radial.ravel()
-    prep.shape = -1, 4
-    assert prep.shape[0] == radial.size
-    if radial_range is None:
-        radial_range = (radial.min(), radial.max() * EPS32)
+    pp_signal, pp_variance, pp_normalization, pp_count = _preproc_channels(raw,
+                                                                           dark=dark,
+                                                                           flat=flat,
+                                                                           solidangle=solidangle,
+                                                                           polarization=polarization,
+                                                                           absorption=absorption,
+                                                                           mask=mask,
+                                                                           dummy=dummy,
+                                                                           delta_dummy=delta_dummy,
+                                                                           normalization_factor=normalization_factor,
+                                                                           variance=variance,
+                                                                           dark_variance=dark_variance,
+                                                                           error_model=error_model)
+    if precomputed_idx is None and fast_histogram is not None:
+        # fast_histogram bins directly, without intermediate index array
+        radial = radial.ravel()
+        assert pp_signal.size == radial.size
+        rmin, rmax = _bin_range(radial, radial_range, EPS32)
+        positions = bin_centers(rmin, rmax, npt)
+        # fast_histogram excludes the upper edge where numpy.histogram includes it
+        rng = (rmin, numpy.nextafter(rmax, numpy.inf))
+
+        def histogram(weights):
+            return fast_histogram.histogram1d(radial, npt, rng, weights=weights)
+    else:
+        if precomputed_idx is None:
+            precomputed_idx = histogram1d_indices(radial, npt, radial_range)
+        idx, positions = precomputed_idx
+        assert pp_signal.size == idx.size
+        # numpy.bincount works on intp: indices provided with another type are converted once
+        idx = idx.astype(numpy.intp, copy=False)
+
+        def histogram(weights):
+            return numpy.bincount(idx, weights=weights, minlength=npt + 1)[:npt]
 
-    histo_signal, _ = numpy.histogram(radial, npt, weights=prep[:, 0], range=radial_range)
     if error_model == ErrorModel.AZIMUTHAL:
         raise NotImplementedError("Numpy histogram are not able to assess variance in azimuthal bins")
-    elif error_model: #Variance, Poisson and Hybrid
-        histo_variance, _ = numpy.histogram(radial, npt, weights=prep[:, 1], range=radial_range)
-        histo_normalization2, _ = numpy.histogram(radial, npt, weights=prep[:, 2]**2, range=radial_range)
-    else: # No error propagated
-        histo_variance = None
-        histo_normalization2 = None
-    histo_normalization, _ = numpy.histogram(radial, npt, weights=prep[:, 2], range=radial_range)
-    histo_count, position = numpy.histogram(radial, npt, weights=prep[:, 3], range=radial_range)
-    positions = (position[1:] + position[:-1]) / 2.0
-
-    mask_empty = histo_count == 0
-    if dummy is not None:
-        empty = dummy
-    with numpy.errstate(divide='ignore', invalid='ignore'):
-        intensity = histo_signal / histo_normalization
-        intensity[mask_empty] = empty
-        if histo_variance is None:
-            std = sem = None
-        else:
-            std = numpy.sqrt(histo_variance / histo_normalization2)
-            sem = numpy.sqrt(histo_variance) / histo_normalization
-            std[mask_empty] = empty
-            sem[mask_empty] = empty
+    weights = [pp_signal, pp_normalization, pp_count]
+    if error_model:  # Variance, Poisson and Hybrid
+        weights += [pp_variance, pp_normalization * pp_normalization]
+    histos = _histogram_block(histogram, weights, (npt,))
+    histo_signal, histo_normalization, histo_count = histos[:3]
+    if error_model:
+        histo_variance, histo_normalization2 = histos[3:]
+    else:  # No error propagated
+        histo_variance = histo_normalization2 = None
+
+    mask_ok = histo_count != 0
+    empty = _empty_value(empty, dummy)
+    intensity = _divide_valid(histo_signal, histo_normalization, mask_ok, empty)
+    if histo_variance is None:
+        std = sem = None
+    else:
+        # sqrt(variance) is shared by std and sem
+        sqrt_var = numpy.sqrt(histo_variance, out=numpy.full_like(histo_signal, empty), where=mask_ok)
+        std = _divide_valid(sqrt_var, numpy.sqrt(histo_normalization2), mask_ok, empty)
+        sem = _divide_valid(sqrt_var, histo_normalization, mask_ok, empty, out=sqrt_var)
     return Integrate1dtpl(positions, intensity, sem, histo_signal, histo_variance, histo_normalization, histo_count,
                           std, sem, histo_normalization2)
 
 
+def histogram1d_batch(radial, npt, raw,
+                      axis=0,
+                      radial_range=None,
+                      precomputed_idx=None,
+                      max_workers=1,
+                      **kwargs):
+    """Integrate a stack of frames sharing the same geometry with histogram1d_engine
+
+    The bin indices are calculated once for the whole stack. Frames are
+    processed sequentially by default, or concurrently in a
+    `concurrent.futures.ThreadPoolExecutor` with `max_workers` > 1.
+    Only the preprocessing (cython implementation) releases the GIL.
+
+    Nota: each thread holds the temporary arrays of a full frame (preprocessed
+    data and the float64 weights used by bincount), about 40 bytes per pixel:
+    600 MB per thread for a 4k x 4k frame.
+
+    :param radial: radial position 2D array (same shape as one frame)
+    :param npt: number of points to integrate over
+    :param raw: 3D array with the stack of frames
+    :param axis: the axis of raw along which frames are stacked
+    :param radial_range: provide lower and upper bound for radial position, by default the extrema
+    :param precomputed_idx: result of `histogram1d_indices`, calculated here if not provided
+    :param max_workers: number of threads, by default 1: frames are processed sequentially
+    :param kwargs: other parameters of `histogram1d_engine` (dark, flat, mask, error_model, ...), shared by all frames
+    :return: Integrate1dtpl named tuple with the position of the bins and
+             all other arrays stacked with the shape (nframes, npt).
+    :raise ValueError: if the stack contains no frame
+    """
+    raw = numpy.moveaxis(numpy.asarray(raw), axis, 0)
+    if len(raw) == 0:
+        raise ValueError("The stack of frames is empty")
+    if precomputed_idx is None:
+        precomputed_idx = histogram1d_indices(radial, npt, radial_range)
+
+    def integrate(frame):
+        return histogram1d_engine(radial, npt, frame,
+                                  radial_range=radial_range,
+                                  precomputed_idx=precomputed_idx,
+                                  **kwargs)
+
+    # The number of threads is bounded explicitly, never by the default of ThreadPoolExecutor
+    max_workers = min(max(1, int(max_workers or 1)), len(raw))
+    if max_workers <= 1:
+        results = [integrate(frame) for frame in raw]
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(integrate, raw))
+    stacked = [None if results[0][i] is None else numpy.stack([res[i] for res in results])
+               for i in range(1, len(Integrate1dtpl._fields))]
+    return Integrate1dtpl(precomputed_idx[1], *stacked)
+
+
 def histogram2d_engine(radial, azimuthal, npt,
                        raw,
                        dark=None,
@@ -199,56 +429,61 @@ def histogram2d_engine(radial, azimuthal, npt,
             plus the various histograms on signal, variance, normalization and count.  
                                                
     """
-    prep = preproc(raw,
-                   dark=dark,
-                   flat=flat,
-                   solidangle=solidangle,
-                   polarization=polarization,
-                   absorption=absorption,
-                   mask=mask,
-                   dummy=dummy,
-                   delta_dummy=delta_dummy,
-                   normalization_factor=normalization_factor,
-                   split_result=4,
-                   variance=variance,
-                   dark_variance=dark_variance,
-                   error_model=error_model,
-                   empty=0
-                   )
+    pp_signal, pp_variance, pp_normalization, pp_count = _preproc_channels(raw,
+                                                                           dark=dark,
+                                                                           flat=flat,
+                                                                           solidangle=solidangle,
+                                                                           polarization=polarization,
+                                                                           absorption=absorption,
+                                                                           mask=mask,
+                                                                           dummy=dummy,
+                                                                           delta_dummy=delta_dummy,
+                                                                           normalization_factor=normalization_factor,
+                                                                           variance=variance,
+                                                                           dark_variance=dark_variance,
+                                                                           error_model=error_model)
+    # Positions are read in their native precision, without copy
     radial = radial.ravel()
     azimuthal = azimuthal.ravel()
-    prep.shape = -1, 4
-    assert prep.shape[0] == radial.size
-    assert prep.shape[0] == azimuthal.size
+    assert pp_signal.size == radial.size
+    assert pp_signal.size == azimuthal.size
     npt = tuple(max(1, i) for i in npt)
-    rng = [radial_range, azimuth_range]
-    histo_signal, _, _ = numpy.histogram2d(radial, azimuthal, npt, weights=prep[:, 0], range=rng)
-    histo_normalization, _, _ = numpy.histogram2d(radial, azimuthal, npt, weights=prep[:, 2], range=rng)
-    histo_count, position_rad, position_azim = numpy.histogram2d(radial, azimuthal, npt, weights=prep[:, 3], range=rng)
-
-    histo_signal = histo_signal.T
-    histo_normalization = histo_normalization.T
-    histo_count = histo_count.T
-    if error_model:
-        histo_variance, _, _ = numpy.histogram2d(radial, azimuthal, npt, weights=prep[:, 1], range=rng)
-        histo_variance = histo_variance.T
+    nbins = npt[0] * npt[1]
+    rmin, rmax = _bin_range(radial, radial_range)
+    amin, amax = _bin_range(azimuthal, azimuth_range)
+
+    if fast_histogram is not None:
+        # fast_histogram excludes the upper edge where numpy.histogram2d includes it
+        rng = ((rmin, numpy.nextafter(rmax, numpy.inf)),
+               (amin, numpy.nextafter(amax, numpy.inf)))
+
+        def histogram(weights):
+            return fast_histogram.histogram2d(radial, azimuthal, npt, rng, weights=weights).T
     else:
-        histo_variance = None
+        # Bins are uniform: the linear 2D-bin index of each pixel is calculated
+        # once and re-used for all histograms, out of range pixels go into an extra bin.
+        idx_rad, valid_rad = uniform_bin_indices(radial, rmin, rmax, npt[0])
+        idx_azim, valid_azim = uniform_bin_indices(azimuthal, amin, amax, npt[1])
+        idx = numpy.ravel_multi_index((idx_rad, idx_azim), npt)
+        idx[numpy.logical_not(numpy.logical_and(valid_rad, valid_azim))] = nbins
 
-    bins_azim = 0.5 * (position_azim[1:] + position_azim[:-1])
-    bins_rad = 0.5 * (position_rad[1:] + position_rad[:-1])
+        def histogram(weights):
+            return numpy.bincount(idx, weights=weights, minlength=nbins + 1)[:nbins].reshape(npt).T
 
-    with numpy.errstate(divide='ignore', invalid='ignore'):
-        intensity = histo_signal / histo_normalization
-        if histo_variance is None:
-            error = None
-        else:
-            error = numpy.sqrt(histo_variance) / histo_normalization
-    mask_empty = histo_count == 0
-    if dummy is not None:
-        empty = dummy
-    intensity[mask_empty] = empty
-    if error is not None:
-        error[mask_empty] = empty
-        error = error
+    weights = [pp_signal, pp_normalization, pp_count]
+    if error_model:
+        weights.append(pp_variance)
+    histos = _histogram_block(histogram, weights, (npt[1], npt[0]))
+    histo_signal, histo_normalization, histo_count = histos[:3]
+    histo_variance = histos[3] if error_model else None
+    bins_rad = bin_centers(rmin, rmax, npt[0])
+    bins_azim = bin_centers(amin, amax, npt[1])
+
+    mask_ok = histo_count != 0
+    empty = _empty_value(empty, dummy)
+    intensity = _divide_valid(histo_signal, histo_normalization, mask_ok, empty)
+    if histo_variance is None:
+        error = None
+    else:
+        error = _divide_valid(numpy.sqrt(histo_variance), histo_normalization, mask_ok, empty)
     return Integrate2dtpl(bins_rad, bins_azim, intensity, error, histo_signal, histo_variance, histo_normalization, histo_count)
@@ -31,7 +31,7 @@ __author__ = "Jerome Kieffer"
 __contact__ = "Jerome.Kieffer@ESRF.eu"
 __license__ = "MIT"
 __copyright__ = "European Synchrotron Radiation Facility, Grenoble, France"
-__date__ = "13/07/2022"
+__date__ = "14/10/2026"
 __status__ = "development"
 
 import warnings
@@ -55,7 +55,8 @@ def preproc(raw,
             dark_variance=None,
             error_model=ErrorModel.NO,
             dtype=numpy.float32,
-            out= None
+            out= None,
+            soa=False
             ):
     """Common preprocessing step for all integration engines
 
@@ -79,6 +80,8 @@ def preproc(raw,
     :param error_model: set to "Poisson" for assuming the detector is poissonian and variance = max(1, raw + dark)
     :param dtype: dtype for all processing
     :param out: output buffer to save a malloc
+    :param soa: in split_result mode, set to True to get a structure of arrays,
+            i.e. the channels along the first dimension, each of them contiguous.
 
     All calculation are performed in single precision floating point (32 bits).
 
@@ -103,6 +106,8 @@ def preproc(raw,
     If split_result is 4, then the count of pixel is appended to the list, i.e. 1 or 0 for masked pixels
     Empty pixels will have all their 2 or 3 or 4 values to 0 (and not to dummy or empty value)
 
+    With soa, the 2, 3 or 4 values are stored along the first dimension instead of the last one.
+
     If poissonian is set to True, the variance is evaluated as raw + dark, with a minimum of 1.
     """
     if isinstance(dtype, str):
@@ -117,6 +122,11 @@ def preproc(raw,
         else:
             out_shape += [2]
         split_result = True
+    else:
+        soa = False
+    nchan = out_shape[-1] if split_result else 1
+    if soa:
+        out_shape = out_shape[-1:] + out_shape[:-1]
     size = raw.size
     if (mask is None) or (mask is False):
         mask = numpy.zeros(size, dtype=bool)
@@ -203,14 +213,16 @@ def preproc(raw,
             result = numpy.zeros(out_shape, dtype=dtype)
         else:
             assert out.dtype == dtype
-            assert out.shape == out_shape 
-            result = out
+            assert out.size == numpy.prod(out_shape)
+            result = out.reshape(out_shape)
                 
         if split_result:
+            if soa:
+                result = numpy.moveaxis(result, 0, -1)
             signal[mask] = 0.0
             normalization[mask] = 0.0
             result[..., 0] = signal.reshape(shape)
-            if out_shape[-1] == 4:
+            if nchan == 4:
                 if variance is not None:
                     variance[mask] = 0.0
                     result[..., 1] = variance.reshape(shape)
@@ -222,6 +234,8 @@ def preproc(raw,
                 variance[mask] = 0.0
                 result[..., 1] = variance.reshape(shape)
                 result[..., 2] = normalization.reshape(shape)
+            if soa:
+                result = numpy.moveaxis(result, -1, 0)
         else:
             lin = result.ravel() 
             lin[...] = signal / normalization
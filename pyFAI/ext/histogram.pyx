@@ -38,7 +38,7 @@ Deprecated, will be replaced by ``silx.math.histogramnd``.
 """
 
 __author__ = "Jerome Kieffer"
-__date__ = "29/06/2022"
+__date__ = "14/10/2026"
 __license__ = "MIT"
 __copyright__ = "2011-2022, ESRF"
 __contact__ = "jerome.kieffer@esrf.fr"
@@ -47,8 +47,10 @@ __contact__ = "jerome.kieffer@esrf.fr"
 include "regrid_common.pxi"
 
 import cython
+import os
 from cython.parallel cimport prange
 from libc.math cimport floor, sqrt
+from libc.stdlib cimport calloc, free
 cimport pyFAI.ext._openmp as _openmp
 
 import logging
@@ -60,6 +62,17 @@ from ..containers import Integrate1dtpl, Integrate2dtpl, ErrorModel
 
 _COMPILED_WITH_OPENMP = _openmp.COMPILED_WITH_OPENMP
 
+cdef:
+    Py_ssize_t MIN_SIZE = 65536  # Minimum number of pixels to go parallel, below the reduction costs more than it saves
+    int MAX_THREADS = 8  # Limit to 8 cores at maximum, the histogram is memory-bound
+
+try:
+    MAX_THREADS = min(MAX_THREADS, len(os.sched_getaffinity(os.getpid())))  # Limit to the actual number of threads
+except Exception:
+    MAX_THREADS = min(MAX_THREADS, os.cpu_count() or 1)
+if not _COMPILED_WITH_OPENMP:
+    MAX_THREADS = 1
+
 
 def _histogram_omp(pos,
                    weights,
@@ -324,6 +337,101 @@ def histogram2d(pos0,
             numpy.asarray(out_count))
 
 
+cdef void _histogram_preproc(floating[::1] cpos,
+                             data_t[:, ::1] cdata,
+                             position_t min0,
+                             position_t inv_delta,
+                             acc_t[::1] out_signal,
+                             acc_t[::1] out_variance,
+                             acc_t[::1] out_norm,
+                             acc_t[::1] out_norm2,
+                             acc_t[::1] out_count,
+                             int nthread=1) nogil:
+    """Accumulate preprocessed data in a single pass over the pixels.
+
+    All accumulators are contiguous, of the size of the number of bins and
+    must be zero-initialized.
+
+    When running with several threads, each of them accumulates into its
+    private histogram (to avoid write conflicts) which are reduced afterwards.
+
+    :param cpos: radial position of each pixel, in single or double precision
+    :param cdata: preprocessed data: signal, variance, normalization, count
+    :param min0: lower bound of the first bin
+    :param inv_delta: inverse of the bin width
+    :param out_signal: accumulator for the signal
+    :param out_variance: accumulator for the variance
+    :param out_norm: accumulator for the normalization
+    :param out_norm2: accumulator for the normalization squared
+    :param out_count: accumulator for the pixel count
+    :param nthread: number of OpenMP threads to use
+    """
+    cdef:
+        Py_ssize_t size = cpos.shape[0], bins = out_signal.shape[0], nchan = cdata.shape[1]
+        Py_ssize_t i, j, bin
+        int thread
+        acc_t norm
+        acc_t *local = NULL
+    if nthread > 1:
+        # private histograms are stored as (thread, bin, quantity)
+        local = <acc_t*> calloc(nthread * bins * 5, sizeof(acc_t))
+    if local != NULL:
+        for i in prange(size, num_threads=nthread, schedule="static"):
+            # floor, not truncation toward zero, to drop the pixels just below min0
+            bin = < Py_ssize_t > floor((cpos[i] - min0) * inv_delta)
+            if bin < 0 or bin >= bins:
+                continue
+            thread = _openmp.omp_get_thread_num()
+            j = 5 * (thread * bins + bin)
+            local[j] += cdata[i, 0]
+            local[j + 1] += cdata[i, 1]
+            if nchan>2:
+                norm = cdata[i, 2]
+                local[j + 2] += norm
+                local[j + 3] += norm * norm
+            if nchan>3:
+                local[j + 4] += cdata[i, 3]
+        for bin in prange(bins, num_threads=nthread, schedule="static"):
+            for thread in range(nthread):
+                j = 5 * (thread * bins + bin)
+                out_signal[bin] += local[j]
+                out_variance[bin] += local[j + 1]
+                out_norm[bin] += local[j + 2]
+                out_norm2[bin] += local[j + 3]
+                out_count[bin] += local[j + 4]
+        free(local)
+    else:
+        for i in range(size):
+            # floor, not truncation toward zero, to drop the pixels just below min0
+            bin = < Py_ssize_t > floor((cpos[i] - min0) * inv_delta)
+            if bin < 0 or bin >= bins:
+                continue
+            out_signal[bin] += cdata[i, 0]
+            out_variance[bin] += cdata[i, 1]
+            if nchan>2:
+                norm = cdata[i, 2]
+                out_norm[bin] += norm
+                out_norm2[bin] += norm * norm
+            if nchan>3:
+                out_count[bin] += cdata[i, 3]
+
+
+cdef void _minmax(floating[::1] cpos,
+                  position_t *minimum,
+                  position_t *maximum) nogil:
+    """Calculate the minimum and the maximum of an array in a single pass"""
+    cdef:
+        Py_ssize_t i, size = cpos.shape[0]
+        floating a, lower, upper
+    upper = lower = cpos[0]
+    for i in range(1, size):
+        a = cpos[i]
+        upper = max(upper, a)
+        lower = min(lower, a)
+    minimum[0] = lower
+    maximum[0] = upper
+
+
 def histogram_preproc(pos,
                       weights,
                       int bins=100,
@@ -346,43 +454,41 @@ def histogram_preproc(pos,
     nchan = weights.shape[ndim - 1]
     assert pos.size == weights.size // nchan
     cdef:
-        Py_ssize_t  size = pos.size, bin = 0, i, j
-        position_t[::1] cpos = numpy.ascontiguousarray(pos.ravel(), dtype=position_d)
+        float[::1] cpos32
+        double[::1] cpos64
         data_t[:, ::1] cdata = numpy.ascontiguousarray(weights, dtype=data_d).reshape(-1, nchan)
-        acc_t[:, ::1] out_prop = numpy.zeros((bins, 5), dtype=acc_d)
+        acc_t[:, ::1] out_prop = numpy.zeros((5, bins), dtype=acc_d)
         position_t delta, min0, max0, maxin0
-        position_t a = 0.0
-        position_t fbin = 0.0
-        position_t epsilon = 1e-10
+        bint do_range = bin_range is None
+        bint single = pos.dtype == numpy.float32
+        int nthread = 1 if pos.size < MIN_SIZE else MAX_THREADS
 
-    if bin_range is not None:
+    # Positions are read in their native precision when possible, to save a copy
+    if single:
+        cpos32 = numpy.ascontiguousarray(pos.ravel())
+    else:
+        cpos64 = numpy.ascontiguousarray(pos.ravel(), dtype=numpy.float64)
+    if not do_range:
         min0 = min(bin_range)
         maxin0 = max(bin_range)
-    else:
-        with nogil:
-            maxin0 = min0 = cpos[0]
-            for i in range(1, size):
-                a = cpos[i]
-                maxin0 = max(maxin0, a)
-                min0 = min(min0, a)
 
     with nogil:
+        if do_range:
+            if single:
+                _minmax(cpos32, &min0, &maxin0)
+            else:
+                _minmax(cpos64, &min0, &maxin0)
         max0 = calc_upper_bound(maxin0)
         delta = (max0 - min0) / float(bins)
-        for i in range(size):
-            a = cpos[i]
-            fbin = get_bin_number(a, min0, delta)
-            bin = < Py_ssize_t > fbin
-            if bin < 0 or bin >= bins:
-                continue
-            out_prop[bin, 0] += cdata[i, 0]
-            out_prop[bin, 1] += cdata[i, 1]
-            if nchan>2:
-                out_prop[bin, 2] += cdata[i, 2]
-                out_prop[bin, 3] += cdata[i, 2]**2
-            if nchan>3:
-                out_prop[bin, 4] += cdata[i, 3]
-    return (numpy.asarray(out_prop),
+        if single:
+            _histogram_preproc(cpos32, cdata, min0, 1.0 / delta,
+                               out_prop[0], out_prop[1], out_prop[2], out_prop[3], out_prop[4],
+                               nthread)
+        else:
+            _histogram_preproc(cpos64, cdata, min0, 1.0 / delta,
+                               out_prop[0], out_prop[1], out_prop[2], out_prop[3], out_prop[4],
+                               nthread)
+    return (numpy.asarray(out_prop).T,
             numpy.linspace(min0 + (0.5 * delta), max0 - (0.5 * delta), bins))
 
 
@@ -437,14 +543,25 @@ def histogram1d_engine(radial, int npt,
 
     """
     cdef:
-        acc_t[:, ::1] res
-        float32_t[:, ::1] prep
-        position_t[::1] position
-        data_t[::1] histo_normalization, histo_signal, histo_variance, histo_count, intensity, std, sem, histo_normalization2
-        data_t norm, sig, var, cnt, norm2
+        data_t[:, ::1] prep
+        float[::1] cpos32
+        double[::1] cpos64
+        acc_t[::1] histo_signal = numpy.zeros(npt, dtype=acc_d)
+        acc_t[::1] histo_variance = numpy.zeros(npt, dtype=acc_d)
+        acc_t[::1] histo_normalization = numpy.zeros(npt, dtype=acc_d)
+        acc_t[::1] histo_normalization2 = numpy.zeros(npt, dtype=acc_d)
+        acc_t[::1] histo_count = numpy.zeros(npt, dtype=acc_d)
+        data_t[::1] intensity = numpy.empty(npt, dtype=data_d)
+        data_t[::1] std = numpy.empty(npt, dtype=data_d)
+        data_t[::1] sem = numpy.empty(npt, dtype=data_d)
+        acc_t norm, sig, var, norm2
+        position_t delta, min0, max0, maxin0
         int i
         bint do_variance=error_model
-    
+        bint do_range = radial_range is None
+        bint single = radial.dtype == numpy.float32
+        int nthread = 1 if radial.size < MIN_SIZE else MAX_THREADS
+
     prep = preproc(raw,
                    dark=dark,
                    flat=flat,
@@ -460,28 +577,41 @@ def histogram1d_engine(radial, int npt,
                    dark_variance=dark_variance,
                    error_model=error_model,
                    ).reshape(-1, 4)
-    res, position = histogram_preproc(radial.ravel(),
-                                      prep,
-                                      npt,
-                                      bin_range=radial_range)
-
-    histo_signal = numpy.empty(npt, dtype=data_d)
-    histo_variance = numpy.empty(npt, dtype=data_d)
-    histo_normalization = numpy.empty(npt, dtype=data_d)
-    histo_normalization2 = numpy.empty(npt, dtype=data_d)
-    histo_count = numpy.empty(npt, dtype=data_d)
-    intensity = numpy.empty(npt, dtype=data_d)
-    std = numpy.empty(npt, dtype=data_d)
-    sem = numpy.empty(npt, dtype=data_d)
+    assert prep.shape[0] == radial.size
+    # Positions are read in their native precision when possible, to save a copy
+    if single:
+        cpos32 = numpy.ascontiguousarray(radial.ravel())
+    else:
+        cpos64 = numpy.ascontiguousarray(radial.ravel(), dtype=numpy.float64)
+    if not do_range:
+        min0 = min(radial_range)
+        maxin0 = max(radial_range)
+
     if dummy is not None:
         empty = dummy
+    # The accumulation and the normalization are performed without the GIL,
+    # allowing several frames to be integrated in parallel from Python threads.
     with nogil:
+        if do_range:
+            if single:
+                _minmax(cpos32, &min0, &maxin0)
+            else:
+                _minmax(cpos64, &min0, &maxin0)
+        max0 = calc_upper_bound(maxin0)
+        delta = (max0 - min0) / (<position_t> npt)
+        if single:
+            _histogram_preproc(cpos32, prep, min0, 1.0 / delta,
+                               histo_signal, histo_variance, histo_normalization,
+                               histo_normalization2, histo_count, nthread)
+        else:
+            _histogram_preproc(cpos64, prep, min0, 1.0 / delta,
+                               histo_signal, histo_variance, histo_normalization,
+                               histo_normalization2, histo_count, nthread)
         for i in range(npt):
-            sig = histo_signal[i] = res[i, 0]
-            var = histo_variance[i] = res[i, 1]
-            norm = histo_normalization[i] = res[i, 2]
-            norm2 = histo_normalization2[i] = res[i, 3]
-            cnt = histo_count[i] = res[i, 4]
+            sig = histo_signal[i]
+            var = histo_variance[i]
+            norm = histo_normalization[i]
+            norm2 = histo_normalization2[i]
             if norm2 > 0.0:
                 intensity[i] = sig / norm
                 if do_variance:
@@ -494,6 +624,7 @@ def histogram1d_engine(radial, int npt,
                 intensity[i] = empty
                 std[i] = empty
                 sem[i] = empty
+    position = numpy.linspace(min0 + (0.5 * delta), max0 - (0.5 * delta), npt)
     return Integrate1dtpl(numpy.asarray(position),
                           numpy.asarray(intensity),
                           numpy.asarray(sem),
@@ -38,7 +38,7 @@ flat-field normalization... taking care of masked values and normalization.
 
 __author__ = "Jerome Kieffer"
 __license__ = "MIT"
-__date__ = "13/07/2022"
+__date__ = "14/10/2026"
 __copyright__ = "2011-2022, ESRF"
 __contact__ = "jerome.kieffer@esrf.fr"
 
@@ -51,7 +51,7 @@ from libc.math cimport fabs, isfinite
 from cython cimport floating
 
 
-cdef floating[:, ::1] c1_preproc(floating[::1] data,
+cdef floating[:, :] c1_preproc(floating[::1] data,
                               floating[::1] dark=None,
                               floating[::1] flat=None,
                               floating[::1] solidangle=None,
@@ -62,7 +62,7 @@ cdef floating[:, ::1] c1_preproc(floating[::1] data,
                               floating delta_dummy=0.0,
                               bint check_dummy=False,
                               floating normalization_factor=1.0,
-                              floating[:, ::1] result = None
+                              floating[:, :] result = None
                               ) with gil:
     """Common preprocessing step for all routines: C-implementation
 
@@ -140,7 +140,7 @@ cdef floating[:, ::1] c1_preproc(floating[::1] data,
     return result
 
 
-cdef floating[:, ::1] c2_preproc(floating[::1] data,
+cdef floating[:, :] c2_preproc(floating[::1] data,
                                  floating[::1] dark=None,
                                  floating[::1] flat=None,
                                  floating[::1] solidangle=None,
@@ -151,7 +151,7 @@ cdef floating[:, ::1] c2_preproc(floating[::1] data,
                                  floating delta_dummy=0,
                                  bint check_dummy=False,
                                  floating normalization_factor=1.0,
-                                 floating[:, ::1] result=None
+                                 floating[:, :] result=None
                                  ) with gil:
     """Common preprocessing step for all routines: C-implementation
     with split_result without variance
@@ -235,7 +235,7 @@ cdef floating[:, ::1] c2_preproc(floating[::1] data,
     return result
 
 
-cdef floating[:, ::1] c3_preproc(floating[::1] data,
+cdef floating[:, :] c3_preproc(floating[::1] data,
                                  floating[::1] dark=None,
                                  floating[::1] flat=None,
                                  floating[::1] solidangle=None,
@@ -249,7 +249,7 @@ cdef floating[:, ::1] c3_preproc(floating[::1] data,
                                  floating[::1] variance=None,
                                  floating[::1] dark_variance=None,
                                  bint poissonian=False,
-                                 floating[:, ::1] result=None,
+                                 floating[:, :] result=None,
                                  ) with gil:
     """Common preprocessing step for all routines: C-implementation
     with split_result with variance in second position: (signal, variance, normalization)
@@ -351,7 +351,7 @@ cdef floating[:, ::1] c3_preproc(floating[::1] data,
     return result
 
 
-cdef floating[:, ::1] c4_preproc(floating[::1] data,
+cdef floating[:, :] c4_preproc(floating[::1] data,
                                  floating[::1] dark=None,
                                  floating[::1] flat=None,
                                  floating[::1] solidangle=None,
@@ -365,7 +365,7 @@ cdef floating[:, ::1] c4_preproc(floating[::1] data,
                                  floating[::1] variance=None,
                                  floating[::1] dark_variance=None,
                                  bint poissonian=False,
-                                 floating[:, ::1] result=None,
+                                 floating[:, :] result=None,
                                  ) with gil:
     """Common preprocessing step for all routines: C-implementation
     with split_result to return (signal, variance, normalization, count)
@@ -478,7 +478,7 @@ def _preproc(floating[::1] raw,
              floating[::1] variance=None,
              floating[::1] dark_variance=None,
              bint poissonian=False,
-             floating[:, ::1] result=None
+             floating[:, :] result=None
              ):
     """specialized preprocessing step for all corrections
 
@@ -537,7 +537,8 @@ def preproc(raw,
             dark_variance=None,
             error_model=ErrorModel.NO,
             dtype=numpy.float32,
-            out=None
+            out=None,
+            soa=False
             ):
     """Common preprocessing step for all integrators
 
@@ -556,6 +557,9 @@ def preproc(raw,
     :param dark_variance: variance of the dark
     :param error_model: set to "poisson" to consider the variance is equal to raw signal (minimum 1)
     :param dtype: type for working: float32 or float64
+    :param out: output buffer to save a malloc
+    :param soa: in split_result mode, set to True to get a structure of arrays,
+            i.e. the channels along the first dimension, each of them contiguous.
 
     All calculation are performed in the `dtype` precision
 
@@ -632,7 +636,15 @@ def preproc(raw,
     else:
         ndim = 1 
     
-    if out is None:
+    soa = soa and ndim > 1
+    if soa:
+        # Channels are stored contiguously, the kernels write through the transposed view
+        if out is None:
+            buffer = numpy.empty((ndim, size), dtype=dtype)
+        else:
+            buffer = out.reshape((ndim, size))
+        result = buffer.T
+    elif out is None:
         result = numpy.empty((size, ndim), dtype=dtype)
     else:
         # assert out.dtype == dtype, "output dtype matches"
@@ -659,5 +671,7 @@ def preproc(raw,
     
     if ndim == 1:
         return numpy.asarray(result).reshape(shape)
+    elif soa:
+        return buffer.reshape((ndim,)+shape)
     else:
         return numpy.asarray(result).reshape(shape+(ndim,))
\ No newline at end of file
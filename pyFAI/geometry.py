@@ -40,7 +40,7 @@ __author__ = "Jerome Kieffer"
 __contact__ = "Jerome.Kieffer@ESRF.eu"
 __license__ = "MIT"
 __copyright__ = "European Synchrotron Radiation Facility, Grenoble, France"
-__date__ = "22/04/2022"
+__date__ = "14/10/2026"
 __status__ = "production"
 __docformat__ = 'restructuredtext'
 
@@ -1083,6 +1083,31 @@ class Geometry(object):
                 out = self.delta_array(shape, unit, scale=scale)
         return out
 
+    def center_extrema(self, shape=None, unit=units.TTH):
+        """
+        Minimum and maximum of the position of the pixel centers.
+
+        The extrema are cached with the other arrays, so the positions are
+        scanned only once per geometry and not at every integration.
+
+        :param shape: shape of the expected array, leave it to None for safety
+        :param unit: radial unit, or None for the azimuthal angle chi
+        :return: 2-tuple with the minimum and the maximum, in internal units (scale=False)
+        """
+        key = "chi_center_extrema" if unit is None else f"{units.to_unit(unit).name}_center_extrema"
+        shape = self.get_shape(shape)
+        # The shape is stored next to the extrema, like center_array checks the shape of the cached array
+        cached = self._cached_array.get(key)
+        if cached is None or cached[0] != shape:
+            if unit is None:
+                ary = self.chiArray(shape)
+            else:
+                ary = self.array_from_unit(shape, "center", unit, scale=False)
+            cached = (shape, (float(ary.min()), float(ary.max())))
+            with self._sem:
+                self._cached_array[key] = cached
+        return cached[1]
+
     def sin_incidence(self, d1, d2, path="cython"):
         """
         Calculate the sinus of the incidence angle (alpha) for current pixels (P).
@@ -1844,6 +1869,7 @@ class Geometry(object):
         with self._sem:
             self.chiDiscAtPi = False
             self._cached_array["chi_center"] = None
+            self._cached_array["chi_center_extrema"] = None
             for key in list(self._cached_array.keys()):
                 if key.startswith("corner"):
                     self._cached_array[key] = None
@@ -1858,6 +1884,7 @@ class Geometry(object):
         with self._sem:
             self.chiDiscAtPi = True
             self._cached_array["chi_center"] = None
+            self._cached_array["chi_center_extrema"] = None
             for key in list(self._cached_array.keys()):
                 if key.startswith("corner"):
                     self._cached_array[key] = None
@@ -34,7 +34,7 @@ __author__ = "Jérôme Kieffer"
 __contact__ = "Jerome.Kieffer@ESRF.eu"
 __license__ = "MIT"
 __copyright__ = "European Synchrotron Radiation Facility, Grenoble, France"
-__date__ = "28/03/2022"
+__date__ = "14/10/2026"
 
 import unittest
 import random
@@ -237,6 +237,23 @@ class TestRecprocalSpacingSquarred(unittest.TestCase):
         delta2 = abs(rc - numpy.atleast_3d(rd2)).max(axis=-1)
         self.assertTrue(numpy.allclose(drd2, delta2, atol=1e-5), "delta rd2 = (q/2pi)**2")
 
+    def test_center_extrema(self):
+        rd2 = self.geo.rd2Array(self.shape)
+        self.assertEqual(self.geo.center_extrema(self.shape, units.RecD2_NM), (rd2.min(), rd2.max()), "rd2 extrema")
+        self.geo.setChiDiscAtZero()
+        chi = self.geo.chiArray(self.shape)
+        self.assertEqual(self.geo.center_extrema(self.shape, None), (chi.min(), chi.max()), "chi extrema")
+        self.geo.setChiDiscAtPi()
+        chi = self.geo.chiArray(self.shape)
+        self.assertEqual(self.geo.center_extrema(self.shape, None), (chi.min(), chi.max()), "chi extrema after discontinuity change")
+
+    def test_center_extrema_shape(self):
+        """The cached extrema follow the shape of the requested array"""
+        unit = units.to_unit("log(1+q.nm)_None")  # no fast path: calculated by center_array
+        for shape in ((20, 30), self.shape):
+            ary = self.geo.center_array(shape, unit, scale=False)
+            self.assertEqual(self.geo.center_extrema(shape, unit), (ary.min(), ary.max()), f"extrema for {shape}")
+
 
 class TestFastPath(utilstest.ParametricTestCase):
     """Test the consistency of the geometry calculation using the Python and the
@@ -32,17 +32,23 @@ __author__ = "Jérôme Kieffer"
 __contact__ = "Jerome.Kieffer@ESRF.eu"
 __license__ = "MIT"
 __copyright__ = "European Synchrotron Radiation Facility, Grenoble, France"
-__date__ = "31/01/2022"
+__date__ = "14/10/2026"
 
 import unittest
 import time
+from concurrent.futures import ThreadPoolExecutor
 import numpy
 import logging
 from numpy import cos
 logger = logging.getLogger(__name__)
 from .utilstest import UtilsTest
 from ..ext.histogram import histogram, histogram2d, histogram2d_preproc
+from ..ext import histogram as histogram_cython
 from ..ext.splitBBoxCSR import HistoBBox1d, HistoBBox2d
+from ..engines import histogram_engine
+from ..containers import ErrorModel
+from ..detectors import Detector
+from ..azimuthalIntegrator import AzimuthalIntegrator
 from ..utils import mathutil
 
 if logger.getEffectiveLevel() == logging.DEBUG:
@@ -396,11 +402,292 @@ class TestHistogram2d(unittest.TestCase):
         self.assertEqual(abs(prop.count - prop.normalization).max(), 0, "count == norm")
 
 
+class TestHistogramEngine(unittest.TestCase):
+    """Compare the numpy engines with the reference numpy.histogram"""
+
+    @classmethod
+    def setUpClass(cls):
+        super(TestHistogramEngine, cls).setUpClass()
+        shape = (256, 256)
+        y, x = numpy.ogrid[:shape[0],:shape[1]]
+        cls.tth = numpy.sqrt(x * x + y * y).astype("float32")
+        cls.chi = numpy.arctan2(y, x).astype("float32") * numpy.ones(shape, dtype="float32")
+        cls.data = numpy.random.poisson(100, shape).astype("float32")
+        cls.mask = numpy.zeros(shape, dtype="int8")
+        cls.mask[10:20, 30:50] = 1
+
+    @classmethod
+    def tearDownClass(cls):
+        super(TestHistogramEngine, cls).tearDownClass()
+        cls.tth = cls.chi = cls.data = cls.mask = None
+
+    def test_histogram1d_engine(self):
+        npt = 100
+        for radial_range in (None, (10.0, 200.0)):
+            res = histogram_engine.histogram1d_engine(self.tth, npt, self.data,
+                                                      mask=self.mask,
+                                                      error_model=ErrorModel.POISSON,
+                                                      radial_range=radial_range)
+            valid = numpy.logical_not(self.mask.ravel())
+            tth = self.tth.ravel()[valid]
+            data = self.data.ravel()[valid]
+            rng = (tth.min(), tth.max() * EPS32) if radial_range is None else radial_range
+            ref_count, ref_edges = numpy.histogram(tth, npt, range=rng)
+            ref_signal, _ = numpy.histogram(tth, npt, weights=data, range=rng)
+            self.assertLess(abs(res.position - 0.5 * (ref_edges[1:] + ref_edges[:-1])).max(), 1e-4, "position")
+            self.assertLessEqual(abs(res.count - ref_count).max(), 1, f"count for {radial_range}")
+            self.assertEqual(res.count.sum(), ref_count.sum(), f"total count for {radial_range}")
+            self.assertAlmostEqual(res.signal.sum(), ref_signal.sum(), 2, f"total signal for {radial_range}")
+            self.assertEqual(abs(res.variance - res.signal).max(), 0, "variance == signal")
+
+    def test_empty(self):
+        """Bins beyond the data are set to the empty value"""
+        res = histogram_engine.histogram1d_engine(self.tth, 100, self.data,
+                                                  error_model=ErrorModel.POISSON,
+                                                  radial_range=(0, 500), empty=-2)
+        empty = res.count == 0
+        self.assertTrue(empty.any(), "some bins are empty")
+        for array in ("intensity", "sigma", "std"):
+            self.assertTrue(numpy.all(getattr(res, array)[empty] == -2), f"{array} is empty")
+            self.assertTrue(numpy.isfinite(getattr(res, array)).all(), f"{array} is finite")
+        res = histogram_engine.histogram2d_engine(self.tth, self.chi, (100, 36), self.data,
+                                                  error_model=ErrorModel.POISSON,
+                                                  radial_range=(0, 500), empty=-2)
+        empty = res.count == 0
+        self.assertTrue(empty.any(), "some bins are empty")
+        self.assertTrue(numpy.all(res.intensity[empty] == -2), "intensity is empty")
+        self.assertTrue(numpy.all(res.sigma[empty] == -2), "sigma is empty")
+
+    @unittest.skipIf(histogram_engine.fast_histogram is None, "fast_histogram is not installed")
+    def test_fast_histogram(self):
+        """fast_histogram and numpy.bincount give the same result"""
+        fast_histogram = histogram_engine.fast_histogram
+        results = {}
+        try:
+            for backend in ("fast_histogram", "numpy"):
+                histogram_engine.fast_histogram = fast_histogram if backend == "fast_histogram" else None
+                results[backend, 1] = histogram_engine.histogram1d_engine(self.tth, 100, self.data,
+                                                                          mask=self.mask,
+                                                                          error_model=ErrorModel.POISSON)
+                results[backend, 2] = histogram_engine.histogram2d_engine(self.tth, self.chi, (100, 36), self.data,
+                                                                          mask=self.mask,
+                                                                          error_model=ErrorModel.POISSON)
+        finally:
+            histogram_engine.fast_histogram = fast_histogram
+        for dim in (1, 2):
+            ref = results["numpy", dim]
+            res = results["fast_histogram", dim]
+            self.assertEqual(res.count.sum(), ref.count.sum(), f"total count {dim}D")
+            # Many pixels of this synthetic geometry lie exactly on a bin edge and may go either side
+            self.assertLessEqual(abs(res.count - ref.count).sum(), 0.01 * ref.count.sum(), f"count {dim}D")
+            self.assertAlmostEqual(res.signal.sum() / ref.signal.sum(), 1.0, 6, f"signal {dim}D")
+
+    def test_no_error_model(self):
+        """Without error propagation, counts are deduced from the normalization"""
+        flat = numpy.ones(self.data.shape, dtype="float32")
+        flat[50:60] = 0  # invalid pixels
+        for engine, npt, args in ((histogram_engine.histogram1d_engine, 100, (self.tth,)),
+                                  (histogram_engine.histogram2d_engine, (100, 36), (self.tth, self.chi))):
+            ref = engine(*args, npt, self.data, mask=self.mask, flat=flat, error_model=ErrorModel.POISSON)
+            res = engine(*args, npt, self.data, mask=self.mask, flat=flat, error_model=ErrorModel.NO)
+            self.assertIsNone(res.variance, "no variance")
+            for array in ("intensity", "signal", "normalization", "count"):
+                self.assertTrue(numpy.array_equal(getattr(ref, array), getattr(res, array), equal_nan=True), f"{array} for {engine.__name__}")
+
+    def test_histogram1d_indices(self):
+        npt = 100
+        for radial_range in (None, (10.0, 200.0)):
+            ref = histogram_engine.histogram1d_engine(self.tth, npt, self.data,
+                                                      mask=self.mask,
+                                                      error_model=ErrorModel.POISSON,
+                                                      radial_range=radial_range)
+            precomputed_idx = histogram_engine.histogram1d_indices(self.tth, npt, radial_range)
+            self.assertEqual(precomputed_idx[0].dtype, numpy.intp, "indices used by bincount")
+            res = histogram_engine.histogram1d_engine(self.tth, npt, self.data,
+                                                      mask=self.mask,
+                                                      error_model=ErrorModel.POISSON,
+                                                      radial_range=radial_range,
+                                                      precomputed_idx=precomputed_idx)
+            for array in ("position", "intensity", "signal", "variance", "normalization", "count"):
+                self.assertTrue(numpy.allclose(getattr(ref, array), getattr(res, array)), f"{array} for {radial_range}")
+
+    def test_histogram2d_engine(self):
+        npt = (100, 36)
+        # validate the bin index calculation, fast_histogram is tested separately
+        fast_histogram = histogram_engine.fast_histogram
+        histogram_engine.fast_histogram = None
+        try:
+            results = [histogram_engine.histogram2d_engine(self.tth, self.chi, npt, self.data,
+                                                           mask=self.mask,
+                                                           error_model=ErrorModel.POISSON,
+                                                           radial_range=rng[0],
+                                                           azimuth_range=rng[1])
+                       for rng in ((None, None), ((10.0, 200.0), (0.1, 1.2)))]
+        finally:
+            histogram_engine.fast_histogram = fast_histogram
+        for rng, res in zip(((None, None), ((10.0, 200.0), (0.1, 1.2))), results):
+            valid = numpy.logical_not(self.mask.ravel())
+            tth = self.tth.ravel()[valid]
+            chi = self.chi.ravel()[valid]
+            data = self.data.ravel()[valid]
+            ref_rng = [(tth.min(), tth.max()) if rng[0] is None else rng[0],
+                       (chi.min(), chi.max()) if rng[1] is None else rng[1]]
+            ref_count, tth_edges, chi_edges = numpy.histogram2d(tth, chi, npt, range=ref_rng)
+            ref_signal, _, _ = numpy.histogram2d(tth, chi, npt, weights=data, range=ref_rng)
+            self.assertEqual(res.count.shape, (npt[1], npt[0]), "shape")
+            self.assertLess(abs(res.radial - 0.5 * (tth_edges[1:] + tth_edges[:-1])).max(), 1e-4, "radial position")
+            self.assertLess(abs(res.azimuthal - 0.5 * (chi_edges[1:] + chi_edges[:-1])).max(), 1e-4, "azimuthal position")
+            self.assertLessEqual(abs(res.count - ref_count.T).max(), 1, f"count for {rng}")
+            self.assertEqual(res.count.sum(), ref_count.sum(), f"total count for {rng}")
+            self.assertAlmostEqual(res.signal.sum(), ref_signal.sum(), 2, f"total signal for {rng}")
+
+
+    def test_double_precision(self):
+        """Double precision positions are binned like in the cython engine"""
+        radial = numpy.random.random((512, 512))
+        data = numpy.random.poisson(100, radial.shape).astype("float32")
+        ref = histogram_cython.histogram1d_engine(radial, 1000, data)
+        res = histogram_engine.histogram1d_engine(radial, 1000, data)
+        self.assertTrue(numpy.array_equal(ref.count, res.count), "count")
+        idx, _ = histogram_engine.histogram1d_indices(radial, 1000)
+        self.assertTrue(numpy.array_equal(ref.count, numpy.bincount(idx, minlength=1001)[:1000]), "indices")
+
+    def test_radial_range(self):
+        """Cython and numpy engines drop the same pixels with an explicit radial range"""
+        radial = numpy.random.random((512, 512))
+        data = numpy.random.poisson(100, radial.shape).astype("float32")
+        ref = histogram_engine.histogram1d_engine(radial, 1000, data, radial_range=(0.1, 0.3))
+        res = histogram_cython.histogram1d_engine(radial, 1000, data, radial_range=(0.1, 0.3))
+        expected = numpy.logical_and(radial >= 0.1, radial <= 0.3).sum()
+        self.assertEqual(ref.count.sum(), expected, "numpy total count")
+        self.assertEqual(res.count.sum(), expected, "cython total count")
+        self.assertLessEqual(abs(res.count - ref.count).max(), 1, "count")
+
+    def test_single_bin(self):
+        """Cython and numpy engines accept a single bin"""
+        ref = histogram_engine.histogram1d_engine(self.tth, 1, self.data, mask=self.mask)
+        res = histogram_cython.histogram1d_engine(self.tth, 1, self.data, mask=self.mask)
+        self.assertEqual(res.count.shape, (1,), "shape")
+        self.assertEqual(res.count[0], ref.count[0], "count")
+        self.assertAlmostEqual(res.signal[0] / ref.signal[0], 1.0, 5, "signal")
+
+    def test_histogram1d_engine_threads(self):
+        """Cython and numpy engines agree, also when called from several threads"""
+        npt = 100
+        frames = [numpy.random.poisson(100, self.data.shape) for i in range(4)]
+
+        def integrate(frame):
+            return histogram_cython.histogram1d_engine(self.tth, npt, frame,
+                                                       mask=self.mask,
+                                                       error_model=ErrorModel.POISSON)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(integrate, frames))
+        for frame, res in zip(frames, results):
+            ref = histogram_engine.histogram1d_engine(self.tth, npt, frame,
+                                                      mask=self.mask,
+                                                      error_model=ErrorModel.POISSON)
+            self.assertEqual(abs(res.count - integrate(frame).count).max(), 0, "threaded == serial")
+            self.assertLess(abs(res.position - ref.position).max(), 1e-3, "position")
+            self.assertLessEqual(abs(res.count - ref.count).max(), 1, "count")
+            self.assertAlmostEqual(res.signal.sum() / ref.signal.sum(), 1.0, 5, "signal")
+
+    def test_histogram1d_batch(self):
+        """A stack of frames gives the same result as the frame by frame integration"""
+        npt = 100
+        stack = numpy.random.poisson(100, (3,) + self.data.shape).astype("float32")
+        for axis, max_workers in ((0, 1), (2, 3)):
+            res = histogram_engine.histogram1d_batch(self.tth, npt, numpy.moveaxis(stack, 0, axis),
+                                                     axis=axis,
+                                                     max_workers=max_workers,
+                                                     mask=self.mask,
+                                                     error_model=ErrorModel.POISSON)
+            self.assertEqual(res.intensity.shape, (3, npt), "shape")
+            for frame, intensity, sigma, count in zip(stack, res.intensity, res.sigma, res.count):
+                ref = histogram_engine.histogram1d_engine(self.tth, npt, frame,
+                                                          mask=self.mask,
+                                                          error_model=ErrorModel.POISSON)
+                self.assertTrue(numpy.array_equal(ref.position, res.position), f"position axis={axis}")
+                self.assertTrue(numpy.array_equal(ref.intensity, intensity, equal_nan=True), f"intensity axis={axis}")
+                self.assertTrue(numpy.array_equal(ref.sigma, sigma, equal_nan=True), f"sigma axis={axis}")
+                self.assertTrue(numpy.array_equal(ref.count, count), f"count axis={axis}")
+        res = histogram_engine.histogram1d_batch(self.tth, npt, stack)
+        self.assertIsNone(res.variance, "no variance without error model")
+        with self.assertRaises(ValueError):
+            histogram_engine.histogram1d_batch(self.tth, npt, numpy.empty((0,) + self.data.shape))
+
+    def test_integrate1d_ng_threads(self):
+        """Several frames integrated concurrently with one integrator"""
+        detector = Detector(1e-4, 1e-4)
+        detector.shape = detector.max_shape = self.data.shape
+        ai = AzimuthalIntegrator(dist=0.1, detector=detector, wavelength=1e-10)
+        frames = [numpy.random.poisson(100, self.data.shape) for i in range(4)]
+        for impl in ("python", "cython"):
+            method = ("no", "histogram", impl)
+
+            def integrate(frame):
+                return ai.integrate1d_ng(frame, 100, method=method, error_model="poisson")
+
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                results = list(executor.map(integrate, frames))
+            for frame, res in zip(frames, results):
+                ref = integrate(frame)
+                self.assertTrue(numpy.allclose(res.intensity, ref.intensity), f"intensity {impl}")
+                self.assertTrue(numpy.allclose(res.sigma, ref.sigma), f"sigma {impl}")
+
+    @unittest.skipIf(histogram_engine.fast_histogram is None, "fast_histogram is not installed")
+    def test_integrate1d_ng_extrema(self):
+        """With fast_histogram, the radial range comes from the cached extrema"""
+        detector = Detector(1e-4, 1e-4)
+        detector.shape = detector.max_shape = self.data.shape
+        ai = AzimuthalIntegrator(dist=0.1, detector=detector, wavelength=1e-10)
+        res = ai.integrate1d_ng(self.data, 100, method=("no", "histogram", "python"), unit="2th_rad")
+        radial = ai.array_from_unit(self.data.shape, "center", "2th_rad", scale=False)
+        ref = histogram_engine.histogram1d_engine(radial, 100, self.data,
+                                                  solidangle=ai.solidAngleArray(self.data.shape))
+        self.assertIsNotNone(ai._cached_array.get("2th_rad_center_extrema"), "extrema are cached")
+        self.assertTrue(numpy.array_equal(res.radial, ref.position), "same bins")
+        self.assertTrue(numpy.array_equal(res.count, ref.count), "same count")
+
+    def test_integrate1d_legacy(self):
+        """The legacy numpy 1D integration agrees with the cython one"""
+        detector = Detector(1e-4, 1e-4)
+        detector.shape = detector.max_shape = self.data.shape
+        ai = AzimuthalIntegrator(dist=0.1, poni1=0.01, poni2=0.012, detector=detector, wavelength=1e-10)
+        for error_model in ("poisson", "azimuthal"):
+            res = {impl: ai._integrate1d_legacy(self.data, 100, method=("no", "histogram", impl), error_model=error_model)
+                   for impl in ("python", "cython")}
+            self.assertTrue(numpy.allclose(res["python"].radial, res["cython"].radial), f"radial {error_model}")
+            self.assertTrue(numpy.allclose(res["python"].intensity, res["cython"].intensity, rtol=1e-2), f"intensity {error_model}")
+            self.assertTrue(numpy.isfinite(res["python"].sigma).all(), f"sigma {error_model}")
+
+    def test_integrate1d_ng_memoized(self):
+        """Bin indices are memoized as intp when fast_histogram is not available"""
+        detector = Detector(1e-4, 1e-4)
+        detector.shape = detector.max_shape = self.data.shape
+        ai = AzimuthalIntegrator(dist=0.1, detector=detector, wavelength=1e-10)
+        method = ("no", "histogram", "python")
+        ref = ai.integrate1d_ng(self.data, 100, method=method, error_model="poisson")
+        fast_histogram = histogram_engine.fast_histogram
+        histogram_engine.fast_histogram = None
+        try:
+            for i in range(2):
+                res = ai.integrate1d_ng(self.data, 100, method=method, error_model="poisson")
+                self.assertTrue(numpy.allclose(res.intensity, ref.intensity), f"intensity #{i}")
+                self.assertTrue(numpy.allclose(res.sigma, ref.sigma), f"sigma #{i}")
+        finally:
+            histogram_engine.fast_histogram = fast_histogram
+        engines = [engine for key, engine in ai.engines.items() if key.method[1:4] == method]
+        self.assertEqual(len(engines), 1, "indices are memoized")
+        self.assertEqual(engines[0].engine[1][0].dtype, numpy.intp, "indices are stored as intp")
+
+
 def suite():
     loader = unittest.defaultTestLoader.loadTestsFromTestCase
     testsuite = unittest.TestSuite()
     testsuite.addTest(loader(TestHistogram1d))
     testsuite.addTest(loader(TestHistogram2d))
+    testsuite.addTest(loader(TestHistogramEngine))
     return testsuite
 
 
@@ -32,7 +32,7 @@ __author__ = "Jérôme Kieffer"
 __contact__ = "Jerome.Kieffer@ESRF.eu"
 __license__ = "MIT"
 __copyright__ = "European Synchrotron Radiation Facility, Grenoble, France"
-__date__ = "13/07/2022"
+__date__ = "14/10/2026"
 
 import os
 import unittest
@@ -44,6 +44,7 @@ logger = logging.getLogger(__name__)
 from ..engines import preproc as python_preproc
 from ..ext import preproc as cython_preproc
 from .utilstest import UtilsTest
+from ..containers import ErrorModel
 
 
 class TestPreproc(unittest.TestCase):
@@ -148,6 +149,21 @@ class TestPreproc(unittest.TestCase):
     def test_cython(self):
         self.one_test(cython_preproc)
 
+    def test_soa(self):
+        """Structure of arrays layout contains the same values as the array of structures"""
+        shape = 8, 8
+        raw = numpy.random.poisson(100, shape)
+        flat = 1.0 + numpy.random.random(shape)
+        mask = numpy.zeros(shape, "int8")
+        mask[:2, :] = 1
+        for preproc in (python_preproc, cython_preproc):
+            for split_result in (2, 4):
+                aos = preproc.preproc(raw, flat=flat, mask=mask, split_result=split_result, error_model=ErrorModel.POISSON)
+                soa = preproc.preproc(raw, flat=flat, mask=mask, split_result=split_result, error_model=ErrorModel.POISSON, soa=True)
+                self.assertEqual(soa.shape, aos.shape[-1:] + shape, f"shape for {preproc.__name__}")
+                self.assertTrue(soa[0].flags["C_CONTIGUOUS"], f"contiguous for {preproc.__name__}")
+                self.assertEqual(abs(numpy.moveaxis(aos, -1, 0) - soa).max(), 0, f"content for {preproc.__name__}")
+
     @unittest.skipIf(UtilsTest.opencl is False, "User request to skip OpenCL tests")
     def test_opencl(self):
         from ..opencl import ocl